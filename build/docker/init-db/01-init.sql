@@ -27,6 +27,16 @@ CREATE INDEX IF NOT EXISTS idx_events_source ON events(source_service);
 CREATE INDEX IF NOT EXISTS idx_events_hostname ON events(hostname);
 CREATE INDEX IF NOT EXISTS idx_events_data_gin ON events USING GIN(data);
 
+-- Normalized (lowercase, collapsed whitespace) search columns, maintained at
+-- ingest by PostgreSQL itself; trigram indexes serve LIKE '%...%' and regex
+ALTER TABLE events ADD COLUMN IF NOT EXISTS command_line TEXT
+    GENERATED ALWAYS AS (regexp_replace(lower(data->>'command_line'), '\s+', ' ', 'g')) STORED;
+ALTER TABLE events ADD COLUMN IF NOT EXISTS file_path TEXT
+    GENERATED ALWAYS AS (regexp_replace(lower(data->>'file_path'), '\s+', ' ', 'g')) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_events_command_line_trgm ON events USING GIN(command_line gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_events_file_path_trgm ON events USING GIN(file_path gin_trgm_ops);
+
 -- =============================================================================
 -- MALWARE HASHES TABLE - 800K hash database
 -- =============================================================================
@@ -47,6 +57,17 @@ CREATE UNIQUE INDEX IF NOT EXISTS idx_malware_hash_value ON malware_hashes(hash_
 CREATE INDEX IF NOT EXISTS idx_malware_hash_type ON malware_hashes(hash_type);
 CREATE INDEX IF NOT EXISTS idx_malware_family ON malware_hashes(family);
 CREATE INDEX IF NOT EXISTS idx_malware_severity ON malware_hashes(severity);
+CREATE INDEX IF NOT EXISTS idx_malware_source ON malware_hashes(source);
+
+-- Staging table for the bulk feed importer (unlogged: contents are disposable)
+CREATE UNLOGGED TABLE IF NOT EXISTS malware_hashes_staging (
+    hash_value VARCHAR(64) NOT NULL,
+    hash_type VARCHAR(10) NOT NULL,
+    threat_name VARCHAR(255),
+    family VARCHAR(100),
+    severity VARCHAR(20) NOT NULL,
+    source VARCHAR(100)
+);
 
 -- =============================================================================
 -- ALERTS TABLE - Analysis results and alerts
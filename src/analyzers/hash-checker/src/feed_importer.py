@@ -0,0 +1,482 @@
+"""
+ZeroTrace Threat Feed Importer
+Streams hash feeds (CSV / JSON / JSON Lines, optionally gzip) into
+malware_hashes with a single set-based merge
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import itertools
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Union
+
+logger = logging.getLogger(__name__)
+
+HASH_TYPES_BY_LENGTH = {32: "md5", 40: "sha1", 64: "sha256"}
+SEVERITIES = ("low", "medium", "high", "critical")
+HEX_DIGITS = frozenset("0123456789abcdef")
+
+# Column names seen in public feeds, mapped to malware_hashes columns
+FIELD_ALIASES = {
+    "hash_value": (
+        "hash_value", "hash", "sha256", "sha256_hash",
+        "sha1", "sha1_hash", "md5", "md5_hash",
+    ),
+    "hash_type": ("hash_type", "hash_algorithm", "algorithm"),
+    "threat_name": ("threat_name", "signature", "name", "malware"),
+    "family": ("family", "malware_family"),
+    "severity": ("severity",),
+}
+
+STAGING_TABLE = "malware_hashes_staging"
+NOTIFY_CHANNEL = "malware_hashes_updated"
+# pg_advisory_lock key so two importers never share the staging table
+IMPORT_LOCK_ID = 0x7A54_4845
+# A JSON array element larger than this is treated as a syntax error
+MAX_JSON_OBJECT_CHARS = 1 << 20
+
+JSON_LINES_SUFFIXES = (".jsonl", ".ndjson")
+_HEADER_FIELD = re.compile(r"[\w .-]+")
+
+
+@dataclass
+class FeedRecord:
+    """One validated malware_hashes row"""
+    hash_value: str
+    hash_type: str
+    threat_name: Optional[str]
+    family: Optional[str]
+    severity: str
+    source: str
+
+
+@dataclass
+class MalformedRow:
+    """Placeholder for a feed row that could not be parsed; always rejected"""
+    error: str
+
+
+FeedRow = Union[Dict[str, Any], MalformedRow]
+
+
+@dataclass
+class ImportStats:
+    """Outcome of a feed import"""
+    rows_read: int = 0
+    rows_valid: int = 0
+    rows_rejected: int = 0
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    load_seconds: float = 0.0
+    merge_seconds: float = 0.0
+    rejected_samples: list = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return self.load_seconds + self.merge_seconds
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.elapsed if self.elapsed else 0.0
+
+
+def open_feed(path: Path) -> TextIO:
+    """Open a feed file as text, transparently decompressing gzip"""
+    with open(path, "rb") as fh:
+        gzipped = fh.read(2) == b"\x1f\x8b"
+    if gzipped:
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def _iter_json(stream: TextIO, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """Yield objects from a top-level JSON array without loading the file"""
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    while True:
+        # Skip whitespace and array punctuation between objects
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,[]":
+            pos += 1
+        if pos < len(buffer):
+            try:
+                obj, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # An array cannot be resynchronized after a syntax error, so
+                # stop instead of buffering the rest of the file
+                if eof or len(buffer) - pos > MAX_JSON_OBJECT_CHARS:
+                    raise ValueError(f"malformed JSON feed: {e}") from e
+            else:
+                if isinstance(obj, dict):
+                    yield obj
+                continue
+        elif eof:
+            return
+        # Object spans the chunk boundary (or buffer drained): read more
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+def _iter_json_lines(stream: TextIO) -> Iterator[FeedRow]:
+    """Yield one object per line; unparseable lines become MalformedRow"""
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield MalformedRow(f"line {number}: invalid JSON ({e.msg})")
+            continue
+        if isinstance(obj, dict):
+            yield obj
+        else:
+            yield MalformedRow(f"line {number}: not a JSON object")
+
+
+def _comment_header(line: str) -> Optional[List[str]]:
+    """Column names from a '# "col_a","col_b",...' comment, None for prose"""
+    text = line.lstrip("#").strip()
+    if "," not in text:
+        return None
+    row = next(csv.reader([text], skipinitialspace=True))
+    fields = [f.strip().strip('"') for f in row]
+    if len(fields) < 2 or not all(_HEADER_FIELD.fullmatch(f) for f in fields):
+        return None
+    return fields
+
+
+def _iter_csv(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """
+    CSV rows, skipping '#' comment lines.
+
+    abuse.ch/MalwareBazaar exports put the column header on the last comment
+    line before the data and separate fields with '", "'; plain CSV files
+    use their first line as the header.
+    """
+    header: Optional[List[str]] = None
+    for line in stream:
+        if not line.startswith("#"):
+            break
+        header = _comment_header(line) or header
+    else:
+        return
+    lines = itertools.chain([line], (x for x in stream if not x.startswith("#")))
+    yield from csv.DictReader(lines, fieldnames=header, skipinitialspace=True)
+
+
+def _infer_format(path: Path) -> str:
+    suffixes = [s.lower() for s in Path(path).suffixes if s.lower() != ".gz"]
+    suffix = suffixes[-1] if suffixes else ""
+    if suffix in JSON_LINES_SUFFIXES:
+        return "jsonl"
+    return "json" if suffix == ".json" else "csv"
+
+
+def iter_feed_rows(path: Path, feed_format: Optional[str] = None) -> Iterator[FeedRow]:
+    """Yield raw feed rows as dicts; format is inferred from the file name"""
+    feed_format = feed_format or _infer_format(path)
+    with open_feed(path) as stream:
+        if feed_format == "jsonl":
+            yield from _iter_json_lines(stream)
+        elif feed_format == "json":
+            yield from _iter_json(stream)
+        else:
+            yield from _iter_csv(stream)
+
+
+def _pick(row: Dict[str, Any], column: str) -> Optional[str]:
+    for alias in FIELD_ALIASES[column]:
+        value = row.get(alias)
+        if value not in (None, ""):
+            return str(value).strip().strip('"')
+    return None
+
+
+def normalize_record(row: FeedRow, source: str) -> FeedRecord:
+    """Validate a raw feed row, raising ValueError when it cannot be imported"""
+    if isinstance(row, MalformedRow):
+        raise ValueError(row.error)
+    row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+    hash_value = (_pick(row, "hash_value") or "").lower()
+    if not hash_value:
+        raise ValueError("missing hash")
+    if not HEX_DIGITS.issuperset(hash_value):
+        raise ValueError(f"non-hex hash {hash_value[:70]!r}")
+
+    hash_type = HASH_TYPES_BY_LENGTH.get(len(hash_value))
+    if hash_type is None:
+        raise ValueError(f"unexpected hash length {len(hash_value)}")
+    declared = (_pick(row, "hash_type") or hash_type).lower().replace("-", "")
+    if declared != hash_type:
+        raise ValueError(f"hash_type {declared!r} does not match {hash_type} length")
+
+    severity = (_pick(row, "severity") or "medium").lower()
+    if severity not in SEVERITIES:
+        severity = "medium"
+
+    threat_name = _pick(row, "threat_name")
+    family = _pick(row, "family")
+    return FeedRecord(
+        hash_value=hash_value,
+        hash_type=hash_type,
+        threat_name=threat_name[:255] if threat_name else None,
+        family=family[:100] if family else None,
+        severity=severity,
+        source=source[:100],
+    )
+
+
+def _copy_field(value: Optional[str]) -> str:
+    """Escape a value for COPY ... FROM STDIN text format"""
+    if value is None:
+        return "\\N"
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class CopyStream(io.TextIOBase):
+    """
+    File-like object feeding validated records to ``copy_expert``.
+
+    Rows are produced on demand as psycopg2 reads, so memory use is bounded
+    by the read size regardless of feed length.
+    """
+
+    def __init__(self, rows: Iterator[FeedRow], source: str, stats: ImportStats):
+        self._rows = rows
+        self._source = source
+        self._stats = stats
+        self._buffer = ""
+
+    def readable(self) -> bool:
+        return True
+
+    def _next_line(self) -> Optional[str]:
+        for row in self._rows:
+            self._stats.rows_read += 1
+            try:
+                record = normalize_record(row, self._source)
+            except ValueError as e:
+                self._stats.rows_rejected += 1
+                samples = self._stats.rejected_samples
+                if len(samples) < 10:
+                    samples.append(f"row {self._stats.rows_read}: {e}")
+                continue
+            self._stats.rows_valid += 1
+            return "\t".join(_copy_field(v) for v in (
+                record.hash_value, record.hash_type, record.threat_name,
+                record.family, record.severity, record.source,
+            )) + "\n"
+        return None
+
+    def read(self, size: int = -1) -> str:
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            line = self._next_line()
+            if line is None:
+                break
+            parts.append(line)
+            length += len(line)
+        data = "".join(parts)
+        if size < 0:
+            self._buffer = ""
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+
+MERGE_SQL = """
+WITH incoming AS (
+    SELECT DISTINCT ON (hash_value) *
+    FROM {staging}
+    ORDER BY hash_value
+),
+{delete_cte}
+updated AS (
+    UPDATE malware_hashes m
+    SET hash_type = i.hash_type,
+        threat_name = i.threat_name,
+        family = i.family,
+        severity = i.severity,
+        source = i.source
+    FROM incoming i
+    WHERE m.hash_value = i.hash_value
+      AND (m.source = i.source OR m.source IS NULL)
+      AND (m.hash_type, m.threat_name, m.family, m.severity, m.source)
+          IS DISTINCT FROM (i.hash_type, i.threat_name, i.family, i.severity, i.source)
+    RETURNING 1
+),
+inserted AS (
+    INSERT INTO malware_hashes
+        (hash_value, hash_type, threat_name, family, severity, source)
+    SELECT i.hash_value, i.hash_type, i.threat_name, i.family, i.severity, i.source
+    FROM incoming i
+    WHERE NOT EXISTS (
+        SELECT 1 FROM malware_hashes m WHERE m.hash_value = i.hash_value
+    )
+    ON CONFLICT (hash_value) DO NOTHING
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM inserted),
+       (SELECT count(*) FROM updated),
+       {deleted_count}
+"""
+
+DELETE_CTE = """deleted AS (
+    DELETE FROM malware_hashes m
+    WHERE m.source = %(source)s
+      AND NOT EXISTS (SELECT 1 FROM incoming i WHERE i.hash_value = m.hash_value)
+    RETURNING 1
+),"""
+
+
+class FeedImporter:
+    """
+    Load a threat feed into malware_hashes.
+
+    The feed is COPYed into an unlogged staging table and then applied with
+    one statement: rows that changed are updated (so the updated_at trigger
+    only fires for real changes), new hashes are inserted and, for full
+    snapshots, hashes this source no longer lists are deleted.
+
+    Readers keep using the old rows until the merge commits. Analyzers
+    LISTENing on ``malware_hashes_updated`` are notified on commit.
+
+    A hash belongs to the first feed that listed it (a NULL source is
+    claimed by the next feed listing it). Other feeds leave that row alone,
+    so a hash shared by two feeds neither changes owner nor fires the
+    trigger on every import, and a snapshot only deletes its own rows.
+    """
+
+    def __init__(self, dsn: Optional[str] = None, source: str = "feed",
+                 full_snapshot: bool = True):
+        if dsn is None:
+            from src.shared.utils.service_discovery import get_database_url
+            dsn = get_database_url()
+        self.dsn = dsn
+        self.source = source
+        self.full_snapshot = full_snapshot
+
+    def run(self, path: Path, feed_format: Optional[str] = None) -> ImportStats:
+        import psycopg2
+
+        stats = ImportStats()
+        conn = psycopg2.connect(self.dsn)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_lock(%s)", (IMPORT_LOCK_ID,))
+                try:
+                    started = time.perf_counter()
+                    self._load_staging(cur, path, feed_format, stats)
+                    conn.commit()
+                    stats.load_seconds = time.perf_counter() - started
+
+                    started = time.perf_counter()
+                    self._merge(cur, stats)
+                    conn.commit()
+                    stats.merge_seconds = time.perf_counter() - started
+
+                    cur.execute(f"TRUNCATE {STAGING_TABLE}")
+                    conn.commit()
+                finally:
+                    # The session lock survives a rollback, but the unlock
+                    # cannot run inside a transaction a failed step aborted
+                    conn.rollback()
+                    cur.execute("SELECT pg_advisory_unlock(%s)", (IMPORT_LOCK_ID,))
+                    conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return stats
+
+    def _load_staging(self, cur, path: Path, feed_format: Optional[str],
+                      stats: ImportStats):
+        cur.execute(f"""
+            CREATE UNLOGGED TABLE IF NOT EXISTS {STAGING_TABLE} (
+                hash_value VARCHAR(64) NOT NULL,
+                hash_type VARCHAR(10) NOT NULL,
+                threat_name VARCHAR(255),
+                family VARCHAR(100),
+                severity VARCHAR(20) NOT NULL,
+                source VARCHAR(100)
+            )
+        """)
+        cur.execute(f"TRUNCATE {STAGING_TABLE}")
+        stream = CopyStream(iter_feed_rows(path, feed_format), self.source, stats)
+        cur.copy_expert(
+            f"COPY {STAGING_TABLE} "
+            "(hash_value, hash_type, threat_name, family, severity, source) FROM STDIN",
+            stream,
+            size=1 << 20,
+        )
+        cur.execute(f"ANALYZE {STAGING_TABLE}")
+
+    def _merge(self, cur, stats: ImportStats):
+        if stats.rows_valid == 0 and self.full_snapshot:
+            # An empty or fully rejected snapshot would wipe the source
+            raise ValueError("Feed produced no valid rows; refusing to apply snapshot")
+        full = self.full_snapshot
+        sql = MERGE_SQL.format(
+            staging=STAGING_TABLE,
+            delete_cte=DELETE_CTE if full else "",
+            deleted_count="(SELECT count(*) FROM deleted)" if full else "0",
+        )
+        cur.execute(sql, {"source": self.source})
+        stats.inserted, stats.updated, stats.deleted = cur.fetchone()
+        cur.execute(
+            "SELECT pg_notify(%s, %s)",
+            (NOTIFY_CHANNEL, json.dumps({
+                "source": self.source,
+                "inserted": stats.inserted,
+                "updated": stats.updated,
+                "deleted": stats.deleted,
+            })),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Import a threat feed into malware_hashes"
+    )
+    parser.add_argument(
+        "feed", type=Path, help="CSV / JSON / JSON Lines feed, optionally gzipped"
+    )
+    parser.add_argument(
+        "--source", required=True, help="Feed name stored in malware_hashes.source"
+    )
+    parser.add_argument("--format", choices=("csv", "json", "jsonl"), default=None)
+    parser.add_argument("--incremental", action="store_true",
+                        help="Feed is a delta: never delete hashes missing from it")
+    parser.add_argument("--dsn", default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    importer = FeedImporter(args.dsn, args.source, full_snapshot=not args.incremental)
+    stats = importer.run(args.feed, args.format)
+    logger.info(
+        "Imported %s: %d rows read, %d rejected, %d inserted, %d updated, %d deleted "
+        "in %.1fs (%.0f rows/s)",
+        args.feed, stats.rows_read, stats.rows_rejected, stats.inserted, stats.updated,
+        stats.deleted, stats.elapsed, stats.rows_per_second,
+    )
+    for sample in stats.rejected_samples:
+        logger.warning("Rejected %s", sample)
+
+
+if __name__ == "__main__":
+    main()
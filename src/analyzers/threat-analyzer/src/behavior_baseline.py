@@ -0,0 +1,471 @@
+"""
+ZeroTrace Behavior Baseline Analyzer
+Scores how rare process and network behavior is on a host and across the
+fleet using constant-size sketches, and raises ALERTS_LOW_ANOMALY
+"""
+
+import asyncio
+import copy
+import json
+import math
+import os
+import struct
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.shared.utils.base_service import BaseAnalyzer, Config
+from src.shared.utils.service_discovery import Topics
+from src.shared.utils.sketches import (
+    CountMinSketch,
+    HyperLogLog,
+    ItemHash,
+    item_hash,
+)
+
+NETWORK_EVENTS = ("network.connection.established", "network.flow")
+
+_CHECKPOINT_MAGIC = b"ZTBL1"
+_LENGTH = struct.Struct("<I")
+
+# Serialized checkpoint contents: JSON header and sketch blobs in header order
+Snapshot = Tuple[bytes, List[bytes]]
+
+
+def sketch_width(distinct_items: int, depth: int, miss_rate: float = 0.01) -> int:
+    """
+    Count-min width at which an unseen item still finds an empty counter in
+    some row, i.e. reads as new, with probability ``1 - miss_rate`` after
+    ``distinct_items`` items were added.
+    """
+    occupied = miss_rate ** (1.0 / depth)
+    return max(64, math.ceil(distinct_items / -math.log1p(-occupied)))
+
+
+@dataclass
+class BaselineConfig:
+    # Distinct features a host is expected to show; sizes the host sketch
+    expected_host_features: int = 2000
+    # 0 derives the width from expected_host_features
+    host_width: int = 0
+    fleet_width: int = 1 << 16
+    depth: int = 4
+    host_hll_precision: int = 8
+    fleet_hll_precision: int = 12
+    window_seconds: float = 86400.0
+    # Counters are multiplied by this once per window (~6.6 day half-life)
+    decay_factor: float = 0.9
+    # A decayed host count below this means "not seen here recently"
+    seen_threshold: float = 0.5
+    # Hosts need this much (decayed) history before they can alert
+    min_host_events: float = 500.0
+    # Alert only if at most this fraction of the fleet shows the feature
+    max_fleet_prevalence: float = 0.05
+    max_pid_names: int = 2048
+
+    def __post_init__(self):
+        if not self.host_width:
+            self.host_width = sketch_width(self.expected_host_features, self.depth)
+
+    @classmethod
+    def from_env(cls) -> "BaselineConfig":
+        return cls(
+            expected_host_features=int(
+                Config.get_env("BASELINE_EXPECTED_HOST_FEATURES", "2000")
+            ),
+            window_seconds=float(Config.get_env("BASELINE_WINDOW_SECONDS", "86400")),
+            decay_factor=float(Config.get_env("BASELINE_DECAY_FACTOR", "0.9")),
+            min_host_events=float(Config.get_env("BASELINE_MIN_HOST_EVENTS", "500")),
+            max_fleet_prevalence=float(
+                Config.get_env("BASELINE_MAX_FLEET_PREVALENCE", "0.05")
+            ),
+        )
+
+
+class HostBaseline:
+    """Fixed-size behavior history for one host"""
+
+    def __init__(self, config: BaselineConfig, window: int):
+        self.counts = CountMinSketch(config.host_width, config.depth)
+        self.distinct_current = HyperLogLog(config.host_hll_precision)
+        self.distinct_previous = HyperLogLog(config.host_hll_precision)
+        self.window = window
+        # Bounded pid -> process name map to resolve parents
+        self.pid_names: "OrderedDict[int, str]" = OrderedDict()
+
+    def advance(self, window: int, decay_factor: float):
+        """Apply decay for windows that passed since this host was last touched"""
+        elapsed = window - self.window
+        if elapsed <= 0:
+            return
+        self.counts.decay(decay_factor ** elapsed)
+        self.distinct_previous = self.distinct_current if elapsed == 1 else \
+            HyperLogLog(self.distinct_current.precision)
+        self.distinct_current = HyperLogLog(self.distinct_current.precision)
+        self.window = window
+
+    def distinct_features(self) -> float:
+        merged = self.distinct_current.copy()
+        merged.merge(self.distinct_previous)
+        return merged.count()
+
+    def merge(self, other: "HostBaseline", decay_factor: float):
+        """Fold in another replica's view of this host at the later window"""
+        other = other.copy()
+        window = max(self.window, other.window)
+        self.advance(window, decay_factor)
+        other.advance(window, decay_factor)
+        self.counts.merge(other.counts)
+        self.distinct_current.merge(other.distinct_current)
+        self.distinct_previous.merge(other.distinct_previous)
+
+    def copy(self) -> "HostBaseline":
+        clone = copy.copy(self)
+        clone.counts = self.counts.copy()
+        clone.distinct_current = self.distinct_current.copy()
+        clone.distinct_previous = self.distinct_previous.copy()
+        clone.pid_names = OrderedDict(self.pid_names)
+        return clone
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.counts.nbytes
+            + self.distinct_current.nbytes
+            + self.distinct_previous.nbytes
+        )
+
+
+class BehaviorBaseline:
+    """
+    Streaming rarity scoring.
+
+    Per host, a count-min sketch tracks decayed feature frequencies and two
+    rotating HyperLogLogs track how many distinct features it showed over the
+    last two windows. Fleet-wide, one count-min sketch counts on how many
+    hosts each feature appeared (incremented when the feature is new on a
+    host) and a HyperLogLog estimates the fleet size. Memory per host and for
+    the fleet is fixed regardless of fleet size or event volume, and every
+    structure merges across replicas.
+
+    Host sketches are sized for ``expected_host_features``. A host showing
+    many more distinct features fills every counter, after which new
+    features read as already seen; ``saturated_hosts`` reports those.
+    """
+
+    def __init__(self, config: Optional[BaselineConfig] = None,
+                 clock: Callable[[], float] = time.time):
+        self.config = config or BaselineConfig()
+        self._clock = clock
+        self.window = self._current_window()
+        self.hosts: Dict[str, HostBaseline] = {}
+        self.fleet_prevalence = CountMinSketch(
+            self.config.fleet_width, self.config.depth
+        )
+        self.fleet_hosts = HyperLogLog(self.config.fleet_hll_precision)
+        # Estimating is O(registers); refresh only when the host set changes
+        self.fleet_size = 0.0
+
+    def _current_window(self) -> int:
+        return int(self._clock() // self.config.window_seconds)
+
+    def _host(self, hostname: str) -> HostBaseline:
+        host = self.hosts.get(hostname)
+        if host is None:
+            host = HostBaseline(self.config, self.window)
+            self.hosts[hostname] = host
+            self.fleet_hosts.add(hostname)
+            self.fleet_size = self.fleet_hosts.count()
+        else:
+            host.advance(self.window, self.config.decay_factor)
+        return host
+
+    def tick(self):
+        """Roll fleet windows forward; hosts catch up lazily when touched"""
+        window = self._current_window()
+        if window > self.window:
+            elapsed = window - self.window
+            self.fleet_prevalence.decay(self.config.decay_factor ** elapsed)
+            self.window = window
+
+    @staticmethod
+    def extract_features(event: Dict[str, Any], host: HostBaseline,
+                         max_pid_names: int = 2048) -> List[Tuple[str, ...]]:
+        data = event.get("data") or {}
+        event_type = event.get("event_type")
+        features: List[Tuple[str, ...]] = []
+        if event_type == "process.created":
+            name = data.get("process_name")
+            if name:
+                features.append(("process", name))
+                parent = host.pid_names.get(data.get("ppid"))
+                if parent:
+                    features.append(("parent_child", parent, name))
+                pid = data.get("pid")
+                if pid is not None:
+                    host.pid_names[pid] = name
+                    host.pid_names.move_to_end(pid)
+                    if len(host.pid_names) > max_pid_names:
+                        host.pid_names.popitem(last=False)
+            if data.get("executable_path"):
+                features.append(("executable", data["executable_path"]))
+        elif event_type in NETWORK_EVENTS:
+            if data.get("destination_port"):
+                features.append((
+                    "dest_port",
+                    data.get("process_name") or "",
+                    str(data["destination_port"]),
+                ))
+            if data.get("destination_ip"):
+                features.append(("dest_ip", data["destination_ip"]))
+        return features
+
+    def observe(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Update the baseline with an event; returns scores for rare features"""
+        hostname = event.get("hostname")
+        if not hostname:
+            return []
+        self.tick()
+        host = self._host(hostname)
+        mature = host.counts.total >= self.config.min_host_events
+        fleet_size = max(1.0, self.fleet_size)
+
+        rare = []
+        for feature in self.extract_features(event, host, self.config.max_pid_names):
+            hashed: ItemHash = item_hash("\x1f".join(feature))
+            host_count = host.counts.estimate_hashed(hashed)
+            new_on_host = host_count < self.config.seen_threshold
+            if new_on_host:
+                fleet_count = self.fleet_prevalence.estimate_hashed(hashed)
+                prevalence = min(1.0, fleet_count / fleet_size)
+                if mature and prevalence <= self.config.max_fleet_prevalence:
+                    score = (1.0 / (1.0 + host_count)) * (1.0 - prevalence)
+                    rare.append({
+                        "feature": list(feature),
+                        "score": round(score, 4),
+                        "host_count": round(host_count, 3),
+                        "fleet_hosts": round(fleet_count, 1),
+                        "fleet_size": round(fleet_size),
+                    })
+                self.fleet_prevalence.add_hashed(hashed)
+            host.counts.add_hashed(hashed)
+            host.distinct_current.add_hashed(hashed)
+        return rare
+
+    def merge(self, other: "BehaviorBaseline"):
+        """
+        Fold another replica's baseline into this one.
+
+        Both sides are decayed to the later of the two windows before their
+        counts are added, and nothing is shared with ``other`` afterwards.
+        """
+        decay_factor = self.config.decay_factor
+        window = max(self.window, other.window)
+        theirs_prevalence = other.fleet_prevalence.copy()
+        if window > self.window:
+            self.fleet_prevalence.decay(decay_factor ** (window - self.window))
+            self.window = window
+        if window > other.window:
+            theirs_prevalence.decay(decay_factor ** (window - other.window))
+        self.fleet_prevalence.merge(theirs_prevalence)
+        self.fleet_hosts.merge(other.fleet_hosts)
+        for hostname, theirs in other.hosts.items():
+            mine = self.hosts.get(hostname)
+            if mine is None:
+                self.hosts[hostname] = theirs.copy()
+            else:
+                mine.merge(theirs, decay_factor)
+        self.fleet_size = self.fleet_hosts.count()
+
+    def saturated_hosts(self) -> Dict[str, float]:
+        """Hosts whose distinct-feature estimate exceeds what the sketch is sized for"""
+        limit = self.config.expected_host_features
+        # Every distinct feature added at least one to the host total, which
+        # decayed at most twice over the two windows the estimate spans
+        min_total = limit * self.config.decay_factor ** 2
+        saturated = {}
+        for hostname, host in self.hosts.items():
+            if host.counts.total <= min_total:
+                continue
+            distinct = host.distinct_features()
+            if distinct > limit:
+                saturated[hostname] = distinct
+        return saturated
+
+    def host_memory_bytes(self) -> int:
+        host = next(iter(self.hosts.values()), None)
+        return (host or HostBaseline(self.config, self.window)).nbytes
+
+    # Checkpoints: magic, JSON header length + header, then the sketch blobs
+    # in header order, each length-prefixed
+
+    def snapshot(self) -> Snapshot:
+        """
+        Serialize the baseline in memory.
+
+        Must run on the thread that calls ``observe`` so the copy is
+        consistent; the result can then be written from any thread.
+        """
+        blobs = [self.fleet_prevalence.to_bytes(), self.fleet_hosts.to_bytes()]
+        host_windows = {}
+        for hostname, host in self.hosts.items():
+            host_windows[hostname] = host.window
+            blobs += [host.counts.to_bytes(), host.distinct_current.to_bytes(),
+                      host.distinct_previous.to_bytes()]
+        header = json.dumps({"window": self.window, "hosts": host_windows}).encode()
+        return header, blobs
+
+    def save_checkpoint(self, path: str):
+        self.write_checkpoint(path, self.snapshot())
+
+    @staticmethod
+    def write_checkpoint(path: str, snapshot: Snapshot):
+        """Write a snapshot atomically (temp file, fsync, rename)"""
+        header, blobs = snapshot
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(_CHECKPOINT_MAGIC)
+            fh.write(_LENGTH.pack(len(header)))
+            fh.write(header)
+            for blob in blobs:
+                fh.write(_LENGTH.pack(len(blob)))
+                fh.write(blob)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load_checkpoint(cls, path: str, config: Optional[BaselineConfig] = None,
+                        clock: Callable[[], float] = time.time) -> "BehaviorBaseline":
+        with open(path, "rb") as fh:
+            payload = fh.read()
+        if not payload.startswith(_CHECKPOINT_MAGIC):
+            raise ValueError(f"{path} is not a baseline checkpoint")
+        offset = len(_CHECKPOINT_MAGIC)
+
+        def chunk() -> bytes:
+            nonlocal offset
+            (length,) = _LENGTH.unpack_from(payload, offset)
+            offset += _LENGTH.size
+            blob = payload[offset:offset + length]
+            offset += length
+            return blob
+
+        header = json.loads(chunk())
+        baseline = cls(config, clock)
+        baseline.window = header["window"]
+        baseline.fleet_prevalence = CountMinSketch.from_bytes(chunk())
+        baseline.fleet_hosts = HyperLogLog.from_bytes(chunk())
+        for hostname, window in header["hosts"].items():
+            host = HostBaseline(baseline.config, window)
+            host.counts = CountMinSketch.from_bytes(chunk())
+            host.distinct_current = HyperLogLog.from_bytes(chunk())
+            host.distinct_previous = HyperLogLog.from_bytes(chunk())
+            baseline.hosts[hostname] = host
+        baseline.fleet_size = baseline.fleet_hosts.count()
+        baseline.tick()
+        return baseline
+
+
+class BehaviorBaselineAnalyzer(BaseAnalyzer):
+    """Analyzer service publishing low-severity rarity alerts"""
+
+    def __init__(self, inbox: Optional[asyncio.Queue] = None):
+        super().__init__("behavior-baseline", "1.0.0")
+        self.checkpoint_path = Config.get_env(
+            "BASELINE_CHECKPOINT_PATH", "/var/lib/zerotrace/behavior-baseline.ckpt"
+        )
+        self.checkpoint_interval = float(
+            Config.get_env("BASELINE_CHECKPOINT_SECONDS", "300")
+        )
+        self.baseline = BehaviorBaseline(BaselineConfig.from_env())
+        self.inbox: asyncio.Queue = inbox or asyncio.Queue(maxsize=10000)
+        self._tasks: List[asyncio.Task] = []
+
+    async def analyze_event(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        rare = self.baseline.observe(event)
+        if not rare:
+            return None
+        top = max(rare, key=lambda r: r["score"])
+        config = self.baseline.config
+        distinct = self.baseline.hosts[event["hostname"]].distinct_features()
+        return {
+            "alert_type": "behavior.rare",
+            "severity": "low",
+            "title": (
+                f"Rare behavior on {event['hostname']}: {' / '.join(top['feature'])}"
+            ),
+            "description": (
+                "Behavior not seen recently on this host and rare across the fleet"
+            ),
+            "source_event_id": event.get("event_id"),
+            "hostname": event["hostname"],
+            "data": {
+                "score": top["score"],
+                "features": rare,
+                "host_distinct_features": round(distinct),
+                # Recall of new features drops on hosts past their sizing
+                "host_saturated": distinct > config.expected_host_features,
+            },
+            "routing_key": Topics.ALERTS_LOW_ANOMALY,
+        }
+
+    async def publish_alert(self, alert: Dict[str, Any]):
+        """Send an alert to the alerts exchange (transport wired by the deployment)"""
+        self.logger.info(
+            "Alert %s", alert["title"], extra={"log_key": "behavior.alert"}
+        )
+
+    async def consume_events(self):
+        while self.is_running:
+            event = await self.inbox.get()
+            alert = await self.analyze_event(event)
+            if alert is not None:
+                await self.publish_alert(alert)
+
+    async def checkpoint(self):
+        """Snapshot on the event loop (no observe() can interleave), write off it"""
+        snapshot = self.baseline.snapshot()
+        await asyncio.get_running_loop().run_in_executor(
+            None, BehaviorBaseline.write_checkpoint, self.checkpoint_path, snapshot
+        )
+
+    def report_saturation(self):
+        saturated = self.baseline.saturated_hosts()
+        if not saturated:
+            return
+        worst = sorted(saturated, key=saturated.get, reverse=True)[:5]
+        self.logger.warning(
+            "%d hosts exceed BASELINE_EXPECTED_HOST_FEATURES=%d; new behavior on "
+            "them may go unnoticed (largest: %s)",
+            len(saturated), self.baseline.config.expected_host_features,
+            ", ".join(f"{name} ~{saturated[name]:.0f}" for name in worst),
+            extra={"log_key": "behavior.saturated"},
+        )
+
+    async def _checkpoint_loop(self):
+        while self.is_running:
+            await asyncio.sleep(self.checkpoint_interval)
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                # Keep checkpointing; the next interval may well succeed
+                self.logger.error("Baseline checkpoint failed: %s", e, exc_info=True)
+            self.report_saturation()
+
+    async def start(self):
+        if os.path.exists(self.checkpoint_path):
+            self.baseline = BehaviorBaseline.load_checkpoint(
+                self.checkpoint_path, self.baseline.config
+            )
+            self.logger.info("Loaded baseline for %d hosts", len(self.baseline.hosts))
+        self._tasks = [
+            asyncio.create_task(self.consume_events()),
+            asyncio.create_task(self._checkpoint_loop()),
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self.baseline.save_checkpoint(self.checkpoint_path)
@@ -0,0 +1,97 @@
+"""
+ZeroTrace API database access
+Connection pool and queries against the hot (PostgreSQL) event store
+"""
+
+import json
+import logging
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+
+from src.shared.utils.base_service import Config
+from src.shared.utils.service_discovery import get_database_url
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ThreadedConnectionPool] = None
+
+
+def get_pool() -> ThreadedConnectionPool:
+    global _pool
+    if _pool is None:
+        _pool = ThreadedConnectionPool(
+            1, int(Config.get_env("API_DB_POOL_SIZE", "10")), get_database_url()
+        )
+    return _pool
+
+
+def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.closeall()
+        _pool = None
+
+
+@contextmanager
+def connection() -> Iterator[Any]:
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
+
+def query_events(
+    start: datetime,
+    end: datetime,
+    event_type: Optional[str] = None,
+    hostname: Optional[str] = None,
+    limit: int = 100,
+) -> List[Dict[str, Any]]:
+    """Events in [start, end) from the events table, newest first"""
+    clauses = ["timestamp >= %(start)s", "timestamp < %(end)s"]
+    params: Dict[str, Any] = {"start": start, "end": end, "limit": limit}
+    if event_type:
+        clauses.append("event_type = %(event_type)s")
+        params["event_type"] = event_type
+    if hostname:
+        clauses.append("hostname = %(hostname)s")
+        params["hostname"] = hostname
+
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(
+            "SELECT id::text AS id, event_type, timestamp, source_service, hostname, "
+            "data, created_at FROM events WHERE " + " AND ".join(clauses) +
+            " ORDER BY timestamp DESC LIMIT %(limit)s",
+            params,
+        )
+        return [dict(row) for row in cur.fetchall()]
+
+
+def stream_query(
+    sql: str, params: Dict[str, Any], batch_size: int = 500
+) -> Iterator[str]:
+    """
+    Run a query through a server-side cursor, yielding one JSON line per row.
+
+    Rows are fetched in batches, so large result sets are never held in
+    memory; the pooled connection is held until the iterator is exhausted
+    or closed.
+    """
+    with connection() as conn:
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex}",
+                         cursor_factory=RealDictCursor) as cur:
+            cur.itersize = batch_size
+            cur.execute(sql, params)
+            for row in cur:
+                yield json.dumps(row, default=str) + "\n"
@@ -5,14 +5,20 @@ Main REST API for the XDR platform
 
 import logging
 from contextlib import asynccontextmanager
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
 
+from src.api import database
+from src.api.search import SearchField, SearchMode, UnindexableQuery, build_search_query
+from src.shared.utils.event_archive import EventArchive
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,12 +26,16 @@ logger = logging.getLogger(__name__)
 # Security
 security = HTTPBearer()
 
+# Cold tier (Parquet) written by the data-processor's event archiver
+archive = EventArchive()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
     logger.info("ZeroTrace API starting up...")
     yield
+    database.close_pool()
     logger.info("ZeroTrace API shutting down...")
 
 
@@ -72,21 +82,83 @@ async def root():
     }
 
 
-# Events API (placeholder)
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _merge_events(
+    hot: List[Dict[str, Any]], cold: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Union hot and archived events, newest first, one row per id (hot wins)"""
+    seen = {event["id"] for event in hot}
+    merged = list(hot)
+    for event in cold:
+        # An archive run interrupted before its commit can leave two copies
+        if event["id"] not in seen:
+            seen.add(event["id"])
+            merged.append(event)
+    merged.sort(key=lambda event: event["timestamp"], reverse=True)
+    return merged
+
+
+# Events API
 @app.get("/api/v1/events")
 async def get_events(
-    limit: int = 100, offset: int = 0, event_type: Optional[str] = None
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    event_type: Optional[str] = None,
+    hostname: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
 ):
-    """Get system events"""
-    # TODO: Implement database query
+    """Get system events (last 24h by default), including archived days"""
+    end = _as_utc(end_time) if end_time else datetime.now(timezone.utc)
+    start = _as_utc(start_time) if start_time else end - timedelta(days=1)
+    # One extra row tells whether another page exists
+    fetch = limit + offset + 1
+
+    events = await run_in_threadpool(
+        database.query_events, start, end, event_type, hostname, fetch
+    )
+    newest_archived = await run_in_threadpool(archive.newest_day)
+    if newest_archived is not None and start.date() <= newest_archived:
+        archived = await run_in_threadpool(
+            archive.query, start, end, event_type, hostname, fetch
+        )
+        events = _merge_events(events, archived)
+
     return {
-        "events": [],
-        "total": 0,
+        "events": events[offset:offset + limit],
+        "has_more": len(events) > offset + limit,
         "limit": limit,
         "offset": offset
     }
 
 
+# Search API
+@app.get("/api/v1/search")
+async def search_events(
+    q: str = Query(..., min_length=1),
+    field: SearchField = SearchField.COMMAND_LINE,
+    mode: SearchMode = SearchMode.SUBSTRING,
+    hostname: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    limit: int = Query(1000, ge=1, le=100000),
+):
+    """Search command lines or file paths (last 24h by default), streamed as NDJSON"""
+    end = _as_utc(end_time) if end_time else datetime.now(timezone.utc)
+    start = _as_utc(start_time) if start_time else end - timedelta(days=1)
+    try:
+        sql, params = build_search_query(q, field, mode, start, end, hostname, limit)
+    except UnindexableQuery as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        database.stream_query(sql, params), media_type="application/x-ndjson"
+    )
+
+
 # Alerts API (placeholder)
 @app.get("/api/v1/alerts")
 async def get_alerts(
@@ -0,0 +1,213 @@
+"""
+ZeroTrace event search
+Builds trigram-indexable queries over the normalized command_line and
+file_path columns and rejects patterns the index cannot serve
+"""
+
+import re
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse
+
+from src.shared.utils.base_service import Config
+
+# pg_trgm can only use the index when the pattern pins down a whole trigram
+MIN_LITERAL_LENGTH = 3
+MAX_PATTERN_LENGTH = 256
+
+# pg_trgm builds trigrams from words of letters and digits only; punctuation
+# such as "///" or "..." yields none and would scan every row in range
+_TRIGRAM_WORD = re.compile(r"[^\W_]{%d}" % MIN_LITERAL_LENGTH)
+
+# Regexes are validated with Python's parser but run by PostgreSQL's ARE
+# engine; these Python-only constructs would fail (or match differently)
+# only once the response is already streaming
+_UNSUPPORTED_OPS = {
+    getattr(sre_parse, "ATOMIC_GROUP", None): "atomic groups (?>...)",
+    getattr(sre_parse, "POSSESSIVE_REPEAT", None): "possessive quantifiers",
+    sre_parse.GROUPREF_EXISTS: "conditional groups (?(...)...)",
+}
+_UNSUPPORTED_AT = {
+    # Backspace and a literal backslash to PostgreSQL, not word boundaries
+    sre_parse.AT_BOUNDARY: r"\b word boundaries",
+    sre_parse.AT_NON_BOUNDARY: r"\B non-boundaries",
+}
+_INLINE_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+_ESCAPE = re.compile(r"\\(.)", re.S)
+
+
+class SearchField(str, Enum):
+    COMMAND_LINE = "command_line"
+    FILE_PATH = "file_path"
+
+
+class SearchMode(str, Enum):
+    SUBSTRING = "substring"
+    PREFIX = "prefix"
+    REGEX = "regex"
+
+
+class UnindexableQuery(ValueError):
+    """Query would fall back to a sequential scan over events"""
+
+
+def normalize(text: str) -> str:
+    """Same normalization the generated search columns apply at ingest"""
+    return re.sub(r"\s+", " ", text.lower())
+
+
+def has_trigram(text: str) -> bool:
+    """Whether the text contains a run of letters/digits pg_trgm can index"""
+    return _TRIGRAM_WORD.search(text) is not None
+
+
+def escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _required_literals(items) -> List[str]:
+    """
+    Literal runs every match of a parsed regex must contain.
+
+    Alternations only contribute when every branch is itself indexable
+    (their weakest branch is what the index can rely on); optional or
+    variable parts end the current run.
+    """
+    runs: List[str] = []
+    current = ""
+    for op, arg in items:
+        if op is sre_parse.LITERAL:
+            current += chr(arg).lower()
+            continue
+        if current:
+            runs.append(current)
+            current = ""
+        if op is sre_parse.SUBPATTERN:
+            runs.extend(_required_literals(arg[-1]))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and arg[0] >= 1:
+            runs.extend(_required_literals(arg[2]))
+        elif op is sre_parse.BRANCH:
+            branch_best = [
+                next(filter(has_trigram, _required_literals(b)), "") for b in arg[1]
+            ]
+            if all(branch_best):
+                runs.append(min(branch_best, key=len))
+    if current:
+        runs.append(current)
+    return runs
+
+
+def _unsupported(items) -> Optional[str]:
+    """First construct in a parsed regex PostgreSQL does not support"""
+    for op, arg in items:
+        if op in _UNSUPPORTED_OPS:
+            return _UNSUPPORTED_OPS[op]
+        if op is sre_parse.AT and arg in _UNSUPPORTED_AT:
+            return _UNSUPPORTED_AT[arg]
+        if op is sre_parse.SUBPATTERN:
+            if arg[1] or arg[2]:
+                return "inline flags (?i:...)"
+            children = [arg[-1]]
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            children = [arg[2]]
+        elif op is sre_parse.BRANCH:
+            children = arg[1]
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            children = [arg[1]]
+        else:
+            continue
+        for child in children:
+            found = _unsupported(child)
+            if found:
+                return found
+    return None
+
+
+def _parse(pattern: str):
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error as e:
+        raise UnindexableQuery(f"Invalid regular expression: {e}") from e
+    if parsed.state.groupdict:
+        problem = "named groups (?P<name>...)"
+    elif _INLINE_FLAGS.match(pattern):
+        problem = "inline flags (?i)"
+    elif "N" in _ESCAPE.findall(pattern):
+        problem = r"\N{...} character names"
+    else:
+        problem = _unsupported(parsed)
+    if problem:
+        raise UnindexableQuery(f"Regex syntax not supported by the database: {problem}")
+    return parsed
+
+
+def required_literals(pattern: str) -> List[str]:
+    return _required_literals(list(_parse(pattern)))
+
+
+def check_indexable(query: str, mode: SearchMode) -> str:
+    """Validate and normalize the search string, raising UnindexableQuery"""
+    if len(query) > MAX_PATTERN_LENGTH:
+        raise UnindexableQuery(f"Pattern longer than {MAX_PATTERN_LENGTH} characters")
+    if mode is SearchMode.REGEX:
+        if not any(has_trigram(literal) for literal in required_literals(query)):
+            raise UnindexableQuery(
+                f"Regex must contain {MIN_LITERAL_LENGTH} consecutive letters or "
+                "digits that every match includes"
+            )
+        return query
+    normalized = normalize(query)
+    if not has_trigram(normalized):
+        raise UnindexableQuery(
+            f"Search string must contain {MIN_LITERAL_LENGTH} consecutive letters "
+            "or digits"
+        )
+    return normalized
+
+
+def build_search_query(
+    query: str,
+    field: SearchField,
+    mode: SearchMode,
+    start: datetime,
+    end: datetime,
+    hostname: Optional[str] = None,
+    limit: int = 1000,
+) -> Tuple[str, Dict[str, Any]]:
+    """SQL and parameters for a guarded search; newest events first"""
+    if end <= start:
+        raise UnindexableQuery("end_time must be after start_time")
+    max_days = int(Config.get_env("SEARCH_MAX_RANGE_DAYS", "31"))
+    if end - start > timedelta(days=max_days):
+        raise UnindexableQuery(f"Time range is limited to {max_days} days")
+
+    pattern = check_indexable(query, mode)
+    column = field.value
+    if mode is SearchMode.SUBSTRING:
+        predicate = f"{column} LIKE %(pattern)s"
+        pattern = f"%{escape_like(pattern)}%"
+    elif mode is SearchMode.PREFIX:
+        predicate = f"{column} LIKE %(pattern)s"
+        pattern = f"{escape_like(pattern)}%"
+    else:
+        predicate = f"{column} ~* %(pattern)s"
+
+    clauses = [predicate, "timestamp >= %(start)s", "timestamp < %(end)s"]
+    params: Dict[str, Any] = {
+        "pattern": pattern, "start": start, "end": end, "limit": limit,
+    }
+    if hostname:
+        clauses.append("hostname = %(hostname)s")
+        params["hostname"] = hostname
+
+    sql = (
+        "SELECT id::text AS id, event_type, timestamp, hostname, "
+        f"{column} AS match, data FROM events WHERE " + " AND ".join(clauses) +
+        " ORDER BY timestamp DESC LIMIT %(limit)s"
+    )
+    return sql, params
@@ -0,0 +1,164 @@
+"""
+ZeroTrace Event Archiver
+Moves events older than the hot retention window from PostgreSQL into the
+Parquet cold tier, one file per day and event type
+"""
+
+import argparse
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.shared.utils.base_service import Config
+from src.shared.utils.event_archive import EventArchive
+from src.shared.utils.service_discovery import get_database_url
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    "id", "event_type", "timestamp", "source_service", "hostname", "data", "created_at",
+)
+
+# Events referenced by alerts or YARA matches stay hot (foreign keys, and
+# they are what investigations open first)
+UNREFERENCED = """
+    NOT EXISTS (SELECT 1 FROM alerts a WHERE a.source_event_id = e.id)
+    AND NOT EXISTS (SELECT 1 FROM yara_matches y WHERE y.event_id = e.id)
+"""
+
+
+@dataclass
+class ArchiveStats:
+    partitions: int = 0
+    rows: int = 0
+    bytes_written: int = 0
+    seconds: float = 0.0
+
+
+class EventArchiver:
+    """
+    Archive aged events day by day.
+
+    Each (day, event_type) partition is exported and deleted inside one
+    REPEATABLE READ transaction, so the DELETE removes exactly the rows the
+    export saw. The Parquet file is fsync'd and renamed before the commit;
+    if the process dies in between, the rows are archived again on the next
+    run and ``EventArchive.query`` returns each duplicated id once.
+    """
+
+    def __init__(
+        self,
+        archive: Optional[EventArchive] = None,
+        dsn: Optional[str] = None,
+        retention_days: Optional[int] = None,
+        batch_size: int = 50000,
+    ):
+        self.archive = archive or EventArchive()
+        self.dsn = dsn or get_database_url()
+        self.retention_days = int(
+            retention_days if retention_days is not None
+            else Config.get_env("EVENTS_HOT_RETENTION_DAYS", "30")
+        )
+        self.batch_size = batch_size
+
+    def cutoff(self, today: Optional[date] = None) -> datetime:
+        """Start of the oldest day that stays in PostgreSQL"""
+        today = today or datetime.now(timezone.utc).date()
+        return datetime.combine(today - timedelta(days=self.retention_days),
+                                dt_time.min, tzinfo=timezone.utc)
+
+    def run(self, today: Optional[date] = None) -> ArchiveStats:
+        import psycopg2
+
+        stats = ArchiveStats()
+        started = time.perf_counter()
+        cutoff = self.cutoff(today)
+        conn = psycopg2.connect(self.dsn)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT DISTINCT (timestamp AT TIME ZONE 'UTC')::date AS day, "
+                    "event_type FROM events WHERE timestamp < %s ORDER BY day",
+                    (cutoff,),
+                )
+                partitions = cur.fetchall()
+            conn.commit()
+
+            for day, event_type in partitions:
+                rows, size = self._archive_partition(conn, day, event_type)
+                stats.partitions += 1
+                stats.rows += rows
+                stats.bytes_written += size
+                logger.info("Archived %d %s events for %s (%d bytes)",
+                            rows, event_type, day, size)
+        finally:
+            conn.close()
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def _archive_partition(self, conn, day: date, event_type: str):
+        import psycopg2.extensions
+
+        start = datetime.combine(day, dt_time.min, tzinfo=timezone.utc)
+        end = start + timedelta(days=1)
+        where = (
+            "e.event_type = %(event_type)s AND e.timestamp >= %(start)s "
+            "AND e.timestamp < %(end)s AND " + UNREFERENCED
+        )
+        params = {"event_type": event_type, "start": start, "end": end}
+
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_REPEATABLE_READ)
+        try:
+            path = self.archive.write_partition(
+                event_type, day, self._fetch_batches(conn, where, params)
+            )
+            rows = 0
+            if path is not None:
+                with conn.cursor() as cur:
+                    cur.execute(f"DELETE FROM events e WHERE {where}", params)
+                    rows = cur.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_READ_COMMITTED)
+        return rows, path.stat().st_size if path is not None else 0
+
+    def _fetch_batches(
+        self, conn, where: str, params: Dict[str, Any]
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Stream rows through a server-side cursor, sorted for tight row groups"""
+        with conn.cursor(name="event_archiver") as cur:
+            cur.itersize = self.batch_size
+            cur.execute(
+                f"SELECT {', '.join('e.' + c for c in COLUMNS)} FROM events e "
+                f"WHERE {where} ORDER BY e.hostname, e.timestamp",
+                params,
+            )
+            while True:
+                batch = cur.fetchmany(self.batch_size)
+                if not batch:
+                    return
+                yield [dict(zip(COLUMNS, row)) for row in batch]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive aged events to Parquet")
+    parser.add_argument("--archive-path", default=None)
+    parser.add_argument("--retention-days", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    archiver = EventArchiver(
+        EventArchive(args.archive_path), retention_days=args.retention_days
+    )
+    stats = archiver.run()
+    logger.info("Archived %d events in %d partitions (%.1f MB) in %.1fs",
+                stats.rows, stats.partitions, stats.bytes_written / 1e6, stats.seconds)
+
+
+if __name__ == "__main__":
+    main()
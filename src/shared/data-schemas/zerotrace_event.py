@@ -15,6 +15,7 @@ class EventType(str, Enum):
     PROCESS_TERMINATED = "process.terminated"
     NETWORK_CONNECTION_ESTABLISHED = "network.connection.established"
     NETWORK_CONNECTION_CLOSED = "network.connection.closed"
+    NETWORK_FLOW = "network.flow"
     FILE_CREATED = "file.created"
     FILE_MODIFIED = "file.modified"
     FILE_DELETED = "file.deleted"
@@ -60,6 +61,23 @@ class NetworkEventData(BaseModel):
     connection_state: Optional[str] = None
 
 
+class NetworkFlowData(BaseModel):
+    """Connections aggregated by the collector over one flush window"""
+    protocol: str = Field(..., regex="^(TCP|UDP|ICMP)$")
+    source_ip: str
+    destination_ip: str
+    destination_port: int = Field(..., ge=1, le=65535)
+    process_id: Optional[int] = None
+    process_name: Optional[str] = None
+    first_seen: datetime
+    last_seen: datetime
+    event_count: int = Field(..., ge=1)
+    established_count: int = Field(0, ge=0)
+    closed_count: int = Field(0, ge=0)
+    bytes_sent: int = Field(0, ge=0)
+    bytes_received: int = Field(0, ge=0)
+
+
 class FileEventData(BaseModel):
     file_path: str
     action: str = Field(..., regex="^(created|modified|deleted|renamed)$")
@@ -94,6 +112,7 @@ class ZeroTraceEvent(BaseModel):
     data: Union[
         ProcessEventData,
         NetworkEventData, 
+        NetworkFlowData,
         FileEventData,
         PersistenceEventData
     ]
@@ -157,6 +176,36 @@ def create_network_event(
     )
 
 
+def create_network_flow_event(
+    source: SourceInfo,
+    hostname: str,
+    protocol: str,
+    source_ip: str,
+    destination_ip: str,
+    destination_port: int,
+    first_seen: datetime,
+    last_seen: datetime,
+    event_count: int,
+    **kwargs
+) -> ZeroTraceEvent:
+    """Create a standardized network flow event"""
+    return ZeroTraceEvent(
+        event_type=EventType.NETWORK_FLOW,
+        source=source,
+        hostname=hostname,
+        data=NetworkFlowData(
+            protocol=protocol,
+            source_ip=source_ip,
+            destination_ip=destination_ip,
+            destination_port=destination_port,
+            first_seen=first_seen,
+            last_seen=last_seen,
+            event_count=event_count,
+            **kwargs
+        )
+    )
+
+
 def create_file_event(
     source: SourceInfo,
     hostname: str,
@@ -6,13 +6,14 @@ Provides common functionality for all services
 import logging
 import asyncio
 import signal
-import sys
 from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any
 import json
 import os
 from datetime import datetime
 
+from .structured_logging import setup_logging, get_logging_stats
+
 
 class BaseService(ABC):
     """Base class for all ZeroTrace services"""
@@ -28,23 +29,20 @@ class BaseService(ABC):
         signal.signal(signal.SIGTERM, self._signal_handler)
     
     def _setup_logging(self) -> logging.Logger:
-        """Setup structured logging"""
-        logger = logging.getLogger(self.service_name)
-        logger.setLevel(logging.INFO)
-        
-        if not logger.handlers:
-            handler = logging.StreamHandler(sys.stdout)
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
-        
-        return logger
+        """Setup structured logging (queued, formatted off the event loop)"""
+        return setup_logging(
+            self.service_name,
+            level=Config.get_env("LOG_LEVEL", "INFO"),
+            log_format=Config.get_env("LOG_FORMAT", "json"),
+            queue_size=int(Config.get_env("LOG_QUEUE_SIZE", "10000")),
+            rate=float(Config.get_env("LOG_RATE_LIMIT", "100")),
+            burst=int(Config.get_env("LOG_RATE_BURST", "200")),
+            debug_sample_every=int(Config.get_env("LOG_DEBUG_SAMPLE_EVERY", "1")),
+        )
     
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals gracefully"""
-        self.logger.info(f"Received signal {signum}, shutting down...")
+        self.logger.info("Received signal %s, shutting down...", signum)
         self.is_running = False
     
     @abstractmethod
@@ -59,7 +57,7 @@ class BaseService(ABC):
     
     async def run(self):
         """Main service loop"""
-        self.logger.info(f"Starting {self.service_name} v{self.version}")
+        self.logger.info("Starting %s v%s", self.service_name, self.version)
         self.is_running = True
         
         try:
@@ -70,10 +68,10 @@ class BaseService(ABC):
                 await asyncio.sleep(1)
                 
         except Exception as e:
-            self.logger.error(f"Service error: {e}")
+            self.logger.error("Service error: %s", e)
         finally:
             await self.stop()
-            self.logger.info(f"{self.service_name} stopped")
+            self.logger.info("%s stopped", self.service_name)
 
 
 class BaseCollector(BaseService):
@@ -124,7 +122,8 @@ class HealthCheck:
             "timestamp": datetime.utcnow().isoformat(),
             "checks": {
                 "service_running": True
-            }
+            },
+            "logging": get_logging_stats()
         }
         
         if additional_checks:
@@ -0,0 +1,195 @@
+"""
+Cold-tier event archive for ZeroTrace
+Per-day, per-event-type Parquet files (zstd, min/max statistics) that the
+data-processor fills from the events table and the API scans on demand
+"""
+
+import json
+import os
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from .base_service import Config
+
+# Mirrors the events table; data stays a JSON document like the JSONB column
+EVENT_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("event_type", pa.string()),
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("source_service", pa.string()),
+    ("hostname", pa.string()),
+    ("data", pa.string()),
+    ("created_at", pa.timestamp("us", tz="UTC")),
+])
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("event_type", pa.string()), ("date", pa.string())]), flavor="hive"
+)
+
+ROW_GROUP_SIZE = 64 * 1024
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def partition_dir(root: Path, event_type: str, day: date) -> Path:
+    return root / f"event_type={event_type}" / f"date={day.isoformat()}"
+
+
+class EventArchive:
+    """
+    Read/write access to the archive directory.
+
+    Files are laid out hive-style (``event_type=.../date=.../part-*.parquet``)
+    so scans prune whole directories, and rows are sorted by hostname and
+    timestamp so Parquet row-group min/max statistics let host and time
+    predicates skip most row groups.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(
+            root or Config.get_env("ARCHIVE_PATH", "/var/lib/zerotrace/archive")
+        )
+
+    def write_partition(self, event_type: str, day: date,
+                        batches: Iterable[List[Dict[str, Any]]]) -> Optional[Path]:
+        """
+        Write one part file for (event_type, day) from batches of event rows.
+
+        Each batch must already be ordered by (hostname, timestamp). The file
+        is written under a temporary name, fsync'd and renamed, so readers
+        never see a partial file. Returns None if there were no rows.
+        """
+        directory = partition_dir(self.root, event_type, day)
+        directory.mkdir(parents=True, exist_ok=True)
+        final = directory / f"part-{uuid.uuid4().hex}.parquet"
+        tmp = directory / f".{final.name}.tmp"
+
+        writer = None
+        try:
+            for batch in batches:
+                if not batch:
+                    continue
+                table = pa.Table.from_pylist([self._to_record(row) for row in batch],
+                                             schema=EVENT_SCHEMA)
+                if writer is None:
+                    writer = pq.ParquetWriter(
+                        tmp, EVENT_SCHEMA, compression="zstd", compression_level=6,
+                        write_statistics=True,
+                    )
+                writer.write_table(table, row_group_size=ROW_GROUP_SIZE)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            tmp.unlink(missing_ok=True)
+            raise
+        if writer is None:
+            return None
+        writer.close()
+
+        with open(tmp, "rb") as fh:
+            os.fsync(fh.fileno())
+        os.replace(tmp, final)
+        return final
+
+    @staticmethod
+    def _to_record(row: Dict[str, Any]) -> Dict[str, Any]:
+        data = row["data"]
+        return {
+            "id": str(row["id"]),
+            "event_type": row["event_type"],
+            "timestamp": _utc(row["timestamp"]),
+            "source_service": row["source_service"],
+            "hostname": row["hostname"],
+            "data": data if isinstance(data, str) else json.dumps(data, default=str),
+            "created_at": _utc(row["created_at"]) if row.get("created_at") else None,
+        }
+
+    def archived_days(self) -> List[date]:
+        """Days with at least one part file, oldest first"""
+        days = {
+            d.name.split("=", 1)[1]
+            for d in self.root.glob("event_type=*/date=*")
+            if any(d.glob("part-*.parquet"))
+        }
+        return [date.fromisoformat(day) for day in sorted(days)]
+
+    def newest_day(self) -> Optional[date]:
+        """Most recent archived day, None for an empty archive"""
+        days = self.archived_days()
+        return days[-1] if days else None
+
+    def query(
+        self,
+        start: datetime,
+        end: datetime,
+        event_type: Optional[str] = None,
+        hostname: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Events in [start, end), newest first, with predicates pushed into the scan.
+
+        Days are scanned newest to oldest and the scan stops once ``limit``
+        rows are collected, so a wide time range with a small limit only
+        reads the most recent partitions. Rows archived twice (a run that
+        died between the rename and its commit) are returned once.
+        """
+        if not self.root.exists():
+            return []
+        start, end = _utc(start), _utc(end)
+        dataset = ds.dataset(
+            self.root, format="parquet", partitioning=PARTITIONING,
+            ignore_prefixes=[".", "_"],
+        )
+
+        ts_type = EVENT_SCHEMA.field("timestamp").type
+        expr = (
+            (ds.field("timestamp") >= pa.scalar(start, ts_type))
+            & (ds.field("timestamp") < pa.scalar(end, ts_type))
+        )
+        if event_type:
+            expr &= ds.field("event_type") == event_type
+        if hostname:
+            expr &= ds.field("hostname") == hostname
+
+        last_day = (end - timedelta(microseconds=1)).date()
+        days = [d for d in self.archived_days() if start.date() <= d <= last_day]
+        tables = []
+        found = 0
+        for day in reversed(days):
+            if found >= limit:
+                break
+            table = dataset.to_table(
+                columns=list(EVENT_SCHEMA.names),
+                filter=expr & (ds.field("date") == day.isoformat()),
+            )
+            if table.num_rows:
+                tables.append(table)
+                # A re-exported day repeats ids only within that day
+                found += pc.count_distinct(table.column("id")).as_py()
+        if not tables:
+            return []
+
+        table = pa.concat_tables(tables).sort_by([("timestamp", "descending")])
+        events: List[Dict[str, Any]] = []
+        seen: Set[str] = set()
+        offset = 0
+        while len(events) < limit and offset < table.num_rows:
+            for event in table.slice(offset, limit).to_pylist():
+                if event["id"] in seen or len(events) >= limit:
+                    continue
+                seen.add(event["id"])
+                event["data"] = json.loads(event["data"])
+                event["archived"] = True
+                events.append(event)
+            offset += limit
+        return events
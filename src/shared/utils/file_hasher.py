@@ -0,0 +1,233 @@
+"""
+File hashing for ZeroTrace collectors
+Computes md5/sha1/sha256 in one streaming pass on a thread pool and caches
+digests by file identity so unchanged files are never re-read
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import stat
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from .base_service import Config
+
+# (st_dev, st_ino, st_size, st_mtime_ns): any write or replace changes one of them
+StatKey = Tuple[int, int, int, int]
+
+CHUNK_SIZE = 1 << 20
+
+# Event types whose payload points at a file worth hashing -> field holding the path
+HASHABLE_EVENTS = {
+    "file.created": "file_path",
+    "file.modified": "file_path",
+    "process.created": "executable_path",
+}
+
+
+def stat_key(st: os.stat_result) -> StatKey:
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def hash_file(path: str,
+              chunk_size: int = CHUNK_SIZE) -> Tuple[Dict[str, str], StatKey]:
+    """
+    Hash a file with md5, sha1 and sha256 in a single read.
+
+    Chunks are read into one reusable buffer and each is fed to all three
+    digests while it is hot in cache. hashlib releases the GIL for these
+    updates, so several files hash in parallel on a thread pool. Files are
+    deliberately not mmap'd: a file truncated mid-hash would raise SIGBUS
+    and kill the collector, whereas ``readinto`` just returns a short read.
+    Returns the digests and the stat key observed before reading.
+    """
+    md5, sha1, sha256 = hashlib.md5(), hashlib.sha1(), hashlib.sha256()
+    with open(path, "rb", buffering=0) as fh:
+        st = os.fstat(fh.fileno())
+        buffer = bytearray(min(chunk_size, max(st.st_size, 1)))
+        view = memoryview(buffer)
+        while True:
+            n = fh.readinto(buffer)
+            if not n:
+                break
+            chunk = view[:n]
+            md5.update(chunk)
+            sha1.update(chunk)
+            sha256.update(chunk)
+    digests = {
+        "md5": md5.hexdigest(), "sha1": sha1.hexdigest(), "sha256": sha256.hexdigest(),
+    }
+    return digests, stat_key(st)
+
+
+class HashCache:
+    """Thread-safe LRU of digests keyed by StatKey, persisted as JSON"""
+
+    def __init__(self, max_entries: int = 100000, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self._entries: "OrderedDict[StatKey, Dict[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: StatKey) -> Optional[Dict[str, str]]:
+        with self._lock:
+            digests = self._entries.get(key)
+            if digests is not None:
+                self._entries.move_to_end(key)
+            return digests
+
+    def put(self, key: StatKey, digests: Dict[str, str]):
+        with self._lock:
+            self._entries[key] = digests
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """Write the cache atomically (temp file + rename)"""
+        if not self.path:
+            return
+        with self._lock:
+            rows = [
+                [*key, d["md5"], d["sha1"], d["sha256"]]
+                for key, d in self._entries.items()
+            ]
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w") as fh:
+            json.dump({"version": 1, "entries": rows}, fh)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        try:
+            with open(self.path) as fh:
+                rows = json.load(fh)["entries"]
+        except (OSError, ValueError, KeyError):
+            # A corrupt or foreign cache file only costs a re-hash
+            return
+        with self._lock:
+            for dev, ino, size, mtime_ns, md5, sha1, sha256 in rows[-self.max_entries:]:
+                self._entries[(dev, ino, size, mtime_ns)] = {
+                    "md5": md5, "sha1": sha1, "sha256": sha256,
+                }
+
+
+@dataclass
+class HasherStats:
+    cache_hits: int = 0
+    cache_misses: int = 0
+    bytes_hashed: int = 0
+    skipped: int = 0
+    # Files still being written to after a retry; no digests reported
+    unstable: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+
+class FileHasher:
+    """
+    Hashing component shared by collectors.
+
+    ``enrich_event`` fills ``data["hashes"]`` on file and process events
+    before they are published, so the hash-checker receives ready digests.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        cache_size: Optional[int] = None,
+        cache_path: Optional[str] = None,
+        max_file_size: Optional[int] = None,
+    ):
+        self.max_file_size = int(
+            max_file_size if max_file_size is not None
+            else Config.get_env("FILE_HASH_MAX_SIZE", str(512 << 20))
+        )
+        self.cache = HashCache(
+            int(cache_size if cache_size is not None
+                else Config.get_env("FILE_HASH_CACHE_SIZE", "100000")),
+            cache_path if cache_path is not None
+            else Config.get_env("FILE_HASH_CACHE_PATH"),
+        )
+        default_workers = str(min(8, os.cpu_count() or 1))
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(max_workers if max_workers is not None
+                            else Config.get_env("FILE_HASH_WORKERS", default_workers)),
+            thread_name_prefix="file-hasher",
+        )
+        self._stats_lock = threading.Lock()
+        self.stats = HasherStats()
+
+    def hash(self, path: str) -> Optional[Dict[str, str]]:
+        """
+        Digests for ``path``; None if it is missing, unreadable, too large or
+        keeps changing while it is read.
+
+        A file that changed mid-read is hashed once more. Digests of a read
+        that overlapped a write describe content that never existed as a
+        whole, so they are never returned.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if st.st_size > self.max_file_size or not stat.S_ISREG(st.st_mode):
+            with self._stats_lock:
+                self.stats.skipped += 1
+            return None
+
+        cached = self.cache.get(stat_key(st))
+        if cached is not None:
+            with self._stats_lock:
+                self.stats.cache_hits += 1
+            return cached
+
+        with self._stats_lock:
+            self.stats.cache_misses += 1
+        for _ in range(2):
+            try:
+                digests, key = hash_file(path)
+                after = stat_key(os.stat(path))
+            except OSError:
+                return None
+            with self._stats_lock:
+                self.stats.bytes_hashed += key[2]
+            if after == key:
+                self.cache.put(key, digests)
+                return digests
+        with self._stats_lock:
+            self.stats.unstable += 1
+        return None
+
+    async def hash_async(self, path: str) -> Optional[Dict[str, str]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.hash, path)
+
+    async def enrich_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Fill ``data["hashes"]`` for hashable events that do not carry them yet"""
+        field_name = HASHABLE_EVENTS.get(event.get("event_type"))
+        data = event.get("data") or {}
+        if field_name and data.get(field_name) and not data.get("hashes"):
+            digests = await self.hash_async(data[field_name])
+            if digests is not None:
+                data["hashes"] = dict(digests)
+        return event
+
+    def close(self):
+        """Stop the worker threads and persist the cache"""
+        self._executor.shutdown(wait=True)
+        self.cache.save()
@@ -0,0 +1,238 @@
+"""
+Network flow aggregation for ZeroTrace collectors
+Merges per-connection network events into flow records before publishing
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .base_service import Config
+
+
+ESTABLISHED = "network.connection.established"
+CLOSED = "network.connection.closed"
+FLOW = "network.flow"
+
+# (hostname, protocol, source_ip, destination_ip, destination_port, pid, process_name)
+FlowKey = Tuple[str, str, str, str, int, Optional[int], Optional[str]]
+
+
+def _parse_timestamp(value: Any) -> datetime:
+    """Accept datetime objects or ISO 8601 strings as produced by ZeroTraceEvent"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.rstrip("Z"))
+    return datetime.utcnow()
+
+
+@dataclass
+class FlowRecord:
+    """Running totals for one flow within the current window"""
+    hostname: str
+    protocol: str
+    source_ip: str
+    destination_ip: str
+    destination_port: int
+    process_id: Optional[int]
+    process_name: Optional[str]
+    first_seen: datetime
+    last_seen: datetime
+    event_count: int = 0
+    established_count: int = 0
+    closed_count: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+    def add(self, event_type: str, timestamp: datetime, data: Dict[str, Any]):
+        """Merge one connection event into the record"""
+        self.event_count += 1
+        if event_type == ESTABLISHED:
+            self.established_count += 1
+        elif event_type == CLOSED:
+            self.closed_count += 1
+        self.bytes_sent += data.get("bytes_sent") or 0
+        self.bytes_received += data.get("bytes_received") or 0
+        if timestamp < self.first_seen:
+            self.first_seen = timestamp
+        if timestamp > self.last_seen:
+            self.last_seen = timestamp
+
+    def to_data(self) -> Dict[str, Any]:
+        """Payload matching NetworkFlowData; process fields only when known"""
+        data: Dict[str, Any] = {
+            "protocol": self.protocol,
+            "source_ip": self.source_ip,
+            "destination_ip": self.destination_ip,
+            "destination_port": self.destination_port,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "event_count": self.event_count,
+            "established_count": self.established_count,
+            "closed_count": self.closed_count,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
+        if self.process_id is not None:
+            data["process_id"] = self.process_id
+        if self.process_name is not None:
+            data["process_name"] = self.process_name
+        return data
+
+
+@dataclass
+class FlowAggregatorStats:
+    """Counters describing how much volume the aggregator removed"""
+    events_in: int = 0
+    events_passed_through: int = 0
+    flows_out: int = 0
+    flows_evicted: int = 0
+
+    @property
+    def events_out(self) -> int:
+        return self.events_passed_through + self.flows_out
+
+    @property
+    def reduction_ratio(self) -> float:
+        """Fraction of input events that were not published individually"""
+        if not self.events_in:
+            return 0.0
+        return 1.0 - self.events_out / self.events_in
+
+
+class FlowAggregator:
+    """
+    Collector-side aggregator for network connection events.
+
+    Established/closed events are merged into flow records keyed by host,
+    protocol, source/destination address, destination port and process.
+    The ephemeral source port is left out of the key so repeated short-lived
+    connections to the same service collapse into one record.
+
+    The first event towards a destination a host has not contacted before is
+    returned from ``add`` immediately so detection latency is unaffected; it is
+    not added to the flow totals, so summing raw and flow events never counts
+    a connection twice.
+    """
+
+    def __init__(
+        self,
+        source: Dict[str, str],
+        flush_interval: Optional[float] = None,
+        max_flows: Optional[int] = None,
+        max_seen_destinations: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.source = source
+        self.flush_interval = float(
+            flush_interval if flush_interval is not None
+            else Config.get_env("FLOW_FLUSH_INTERVAL_SECONDS", "30")
+        )
+        self.max_flows = int(
+            max_flows if max_flows is not None
+            else Config.get_env("FLOW_MAX_ENTRIES", "50000")
+        )
+        self.max_seen_destinations = int(
+            max_seen_destinations if max_seen_destinations is not None
+            else Config.get_env("FLOW_MAX_SEEN_DESTINATIONS", "100000")
+        )
+        self._clock = clock
+        self._flows: "OrderedDict[FlowKey, FlowRecord]" = OrderedDict()
+        self._seen_destinations: "OrderedDict[Tuple[str, str, int], None]" = (
+            OrderedDict()
+        )
+        self._window_started = clock()
+        self.stats = FlowAggregatorStats()
+
+    def __len__(self) -> int:
+        return len(self._flows)
+
+    @staticmethod
+    def is_aggregatable(event: Dict[str, Any]) -> bool:
+        """Whether the event is a connection event this aggregator handles"""
+        return event.get("event_type") in (ESTABLISHED, CLOSED)
+
+    def add(self, event: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Merge a connection event into its flow.
+
+        Returns the events that should be published right away: the raw event
+        when its destination is new for the host, flows evicted to respect the
+        memory cap, and the whole window when the flush interval has elapsed.
+        """
+        out: List[Dict[str, Any]] = []
+        if not self.is_aggregatable(event):
+            # Anything other than connection events is not ours to hold back
+            return [event]
+
+        self.stats.events_in += 1
+        data = event["data"]
+        hostname = event["hostname"]
+        timestamp = _parse_timestamp(event.get("timestamp"))
+
+        if self._mark_destination_seen(hostname, data):
+            self.stats.events_passed_through += 1
+            out.append(event)
+            out.extend(self.poll())
+            return out
+
+        key: FlowKey = (
+            hostname,
+            data["protocol"],
+            data["source_ip"],
+            data["destination_ip"],
+            data["destination_port"],
+            data.get("process_id"),
+            data.get("process_name"),
+        )
+        record = self._flows.get(key)
+        if record is None:
+            if len(self._flows) >= self.max_flows:
+                _, oldest = self._flows.popitem(last=False)
+                self.stats.flows_evicted += 1
+                out.append(self._flow_event(oldest))
+            record = FlowRecord(*key, first_seen=timestamp, last_seen=timestamp)
+            self._flows[key] = record
+        record.add(event["event_type"], timestamp, data)
+
+        out.extend(self.poll())
+        return out
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Flush the current window if the flush interval has elapsed"""
+        if self._clock() - self._window_started < self.flush_interval:
+            return []
+        return self.flush()
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Emit every pending flow and start a new window"""
+        flows = [self._flow_event(record) for record in self._flows.values()]
+        self._flows.clear()
+        self._window_started = self._clock()
+        return flows
+
+    def _mark_destination_seen(self, hostname: str, data: Dict[str, Any]) -> bool:
+        """Record the destination for the host, returning True if it is new"""
+        key = (hostname, data["destination_ip"], data["destination_port"])
+        if key in self._seen_destinations:
+            self._seen_destinations.move_to_end(key)
+            return False
+        self._seen_destinations[key] = None
+        if len(self._seen_destinations) > self.max_seen_destinations:
+            self._seen_destinations.popitem(last=False)
+        return True
+
+    def _flow_event(self, record: FlowRecord) -> Dict[str, Any]:
+        self.stats.flows_out += 1
+        return {
+            "event_id": str(uuid.uuid4()),
+            "timestamp": datetime.utcnow(),
+            "event_type": FLOW,
+            "source": self.source,
+            "hostname": record.hostname,
+            "data": record.to_data(),
+        }
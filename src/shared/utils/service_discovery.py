@@ -190,6 +190,11 @@ class Topics:
     
     # Incidents
     INCIDENTS_CRITICAL = "incidents.critical"
+    
+    @staticmethod
+    def binding_pattern(topic: str) -> str:
+        """Binding key matching a topic and its host-partitioned keys (topic.pNNN)"""
+        return f"{topic}.#"
 
 
 # Exchange and routing configuration
@@ -0,0 +1,217 @@
+"""
+Host-affinity sharding for ZeroTrace analyzers
+Routes events to partition queues by hostname and assigns partitions to
+analyzer replicas, handing partition state over when replicas come and go
+"""
+
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .base_service import Config
+
+# (partition, previous owner, new owner) produced by a rebalance
+Move = Tuple[int, Optional[str], str]
+
+
+def _host_key(hostname: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(hostname.lower().encode(), digest_size=8).digest(), "big"
+    )
+
+
+def jump_hash(key: int, num_buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping & Veach).
+
+    Growing from n to n+1 buckets moves only 1/(n+1) of the keys, so the
+    partition count can be raised without reshuffling every host.
+    """
+    b, j = -1, 0
+    while j < num_buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+def partition_for_host(hostname: str, num_partitions: int) -> int:
+    """Partition that owns every event from ``hostname``"""
+    return jump_hash(_host_key(hostname), num_partitions)
+
+
+class ShardRouter:
+    """
+    Maps (topic, hostname) to partitioned routing keys.
+
+    Partitioned keys extend the plain topic (``events.raw.processes.p007``),
+    so consumers that bind ``Topics.binding_pattern(topic)`` keep receiving
+    everything while sharded replicas bind one queue per partition.
+    """
+
+    def __init__(self, num_partitions: Optional[int] = None):
+        self.num_partitions = int(
+            num_partitions if num_partitions is not None
+            else Config.get_env("SHARD_PARTITIONS", "64")
+        )
+
+    def partition(self, hostname: str) -> int:
+        return partition_for_host(hostname, self.num_partitions)
+
+    @staticmethod
+    def partition_key(topic: str, partition: int) -> str:
+        return f"{topic}.p{partition:03d}"
+
+    def routing_key(self, topic: str, hostname: str) -> str:
+        return self.partition_key(topic, self.partition(hostname))
+
+    def route_event(self, topic: str, event: Dict[str, Any]) -> str:
+        return self.routing_key(topic, event["hostname"])
+
+    def partition_keys(self, topic: str) -> List[str]:
+        return [self.partition_key(topic, p) for p in range(self.num_partitions)]
+
+
+class PartitionedConsumer:
+    """
+    Mixin for stateful analyzers consuming partition queues.
+
+    Per-host state lives under the partition that owns the host, so moving a
+    partition to another replica moves exactly the state that replica needs.
+    Subclasses override the hooks to pause/resume their queue consumers.
+    """
+
+    def __init__(self, replica_id: str, router: ShardRouter):
+        self.replica_id = replica_id
+        self.router = router
+        self.assigned_partitions: Set[int] = set()
+        self.partition_state: Dict[int, Dict[str, Any]] = {}
+
+    def host_state(self, hostname: str) -> Dict[str, Any]:
+        """Mutable state dict for one host, stored under its partition"""
+        partition = self.router.partition(hostname)
+        if partition not in self.assigned_partitions:
+            raise KeyError(f"{hostname} belongs to partition {partition}, "
+                           f"not assigned to {self.replica_id}")
+        return self.partition_state.setdefault(partition, {}).setdefault(hostname, {})
+
+    def on_partitions_revoked(self, partitions: Set[int]):
+        """Stop consuming these partitions (called before state is exported)"""
+        self.assigned_partitions -= partitions
+
+    def on_partitions_assigned(self, partitions: Set[int]):
+        """Start consuming these partitions (called after state is imported)"""
+        self.assigned_partitions |= partitions
+
+    def export_partition_state(self, partition: int) -> Dict[str, Any]:
+        return self.partition_state.pop(partition, {})
+
+    def import_partition_state(self, partition: int, state: Dict[str, Any]):
+        self.partition_state[partition] = state
+
+
+class PartitionCoordinator:
+    """
+    Local coordinator assigning partitions to replicas.
+
+    Assignment is sticky and balanced: every replica gets ``P // R`` or one
+    more partition, and a rebalance only moves partitions off replicas that
+    left or hold more than their share. Moved partitions are revoked on the
+    old owner, their state exported and imported on the new owner, then
+    assigned. A replica that disappears without ``leave`` loses its state.
+    """
+
+    def __init__(self, num_partitions: int):
+        self.num_partitions = num_partitions
+        self._replicas: Dict[str, PartitionedConsumer] = {}
+        self._owners: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def assignment(self) -> Dict[str, Set[int]]:
+        result: Dict[str, Set[int]] = {rid: set() for rid in self._replicas}
+        for partition, owner in self._owners.items():
+            result[owner].add(partition)
+        return result
+
+    def owner(self, partition: int) -> Optional[str]:
+        return self._owners.get(partition)
+
+    def join(self, replica: PartitionedConsumer) -> List[Move]:
+        with self._lock:
+            self._replicas[replica.replica_id] = replica
+            return self._rebalance()
+
+    def leave(self, replica_id: str) -> List[Move]:
+        """Graceful departure: partitions (and their state) move to the others"""
+        with self._lock:
+            return self._rebalance(leaving=replica_id)
+
+    def fail(self, replica_id: str) -> List[Move]:
+        """Replica vanished: partitions move, state is rebuilt from scratch"""
+        with self._lock:
+            self._replicas.pop(replica_id, None)
+            for partition, owner in list(self._owners.items()):
+                if owner == replica_id:
+                    del self._owners[partition]
+            return self._rebalance()
+
+    def _targets(self, replica_ids: List[str]) -> Dict[str, int]:
+        base, extra = divmod(self.num_partitions, len(replica_ids))
+        return {
+            rid: base + (1 if i < extra else 0) for i, rid in enumerate(replica_ids)
+        }
+
+    def _rebalance(self, leaving: Optional[str] = None) -> List[Move]:
+        """Recompute ownership; returns (partition, old_owner, new_owner) moves"""
+        members = sorted(rid for rid in self._replicas if rid != leaving)
+        if not members:
+            if leaving is not None:
+                self._replicas.pop(leaving, None)
+            self._owners.clear()
+            return []
+
+        targets = self._targets(members)
+        kept: Dict[str, List[int]] = {rid: [] for rid in members}
+        unowned: List[int] = []
+        for partition in range(self.num_partitions):
+            owner = self._owners.get(partition)
+            if owner in kept and len(kept[owner]) < targets[owner]:
+                kept[owner].append(partition)
+            else:
+                unowned.append(partition)
+
+        moves: List[Move] = []
+        for rid in members:
+            while len(kept[rid]) < targets[rid]:
+                partition = unowned.pop()
+                kept[rid].append(partition)
+                moves.append((partition, self._owners.get(partition), rid))
+
+        self._apply(moves)
+        if leaving is not None:
+            self._replicas.pop(leaving, None)
+        return moves
+
+    def _apply(self, moves: Iterable[Move]):
+        by_old: Dict[Optional[str], Set[int]] = {}
+        for partition, old, _ in moves:
+            by_old.setdefault(old, set()).add(partition)
+
+        states: Dict[int, Dict[str, Any]] = {}
+        for old, partitions in by_old.items():
+            replica = self._replicas.get(old) if old is not None else None
+            if replica is None:
+                continue
+            replica.on_partitions_revoked(partitions)
+            for partition in partitions:
+                states[partition] = replica.export_partition_state(partition)
+
+        by_new: Dict[str, Set[int]] = {}
+        for partition, _, new in moves:
+            state = states.get(partition, {})
+            self._replicas[new].import_partition_state(partition, state)
+            self._owners[partition] = new
+            by_new.setdefault(new, set()).add(partition)
+        for new, partitions in by_new.items():
+            self._replicas[new].on_partitions_assigned(partitions)
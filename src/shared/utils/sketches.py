@@ -0,0 +1,186 @@
+"""
+Probabilistic sketches for ZeroTrace analyzers
+Fixed-size, mergeable frequency (count-min) and cardinality (HyperLogLog)
+estimators with compact binary serialization for checkpoints
+"""
+
+import hashlib
+import math
+import struct
+from array import array
+from typing import Tuple, Union
+
+Item = Union[str, bytes]
+ItemHash = Tuple[int, int]
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def item_hash(item: Item) -> ItemHash:
+    """
+    128-bit hash split into two 64-bit halves.
+
+    Compute it once per item and pass it to the ``*_hashed`` methods when
+    the same item updates several sketches.
+    """
+    if isinstance(item, str):
+        item = item.encode()
+    digest = hashlib.blake2b(item, digest_size=16).digest()
+    low = int.from_bytes(digest[:8], "little")
+    high = int.from_bytes(digest[8:], "little") | 1
+    return low, high
+
+
+class CountMinSketch:
+    """
+    Count-min sketch with float counters so windows can be decayed.
+
+    Estimates never undercount; the overcount is at most ``e / width`` of the
+    total mass with probability ``1 - exp(-depth)``. Rows are indexed with
+    double hashing (h1 + i*h2) from a single 128-bit hash.
+    """
+
+    _HEADER = struct.Struct("<4sII d")
+    _MAGIC = b"ZCMS"
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.total = 0.0
+        self._counters = array("f", bytes(4 * width * depth))
+
+    def _indexes(self, hashed: ItemHash):
+        h1, h2 = hashed
+        width = self.width
+        return [
+            row * width + (h1 + row * h2 & _MASK64) % width for row in range(self.depth)
+        ]
+
+    def add_hashed(self, hashed: ItemHash, count: float = 1.0):
+        counters = self._counters
+        for index in self._indexes(hashed):
+            counters[index] += count
+        self.total += count
+
+    def estimate_hashed(self, hashed: ItemHash) -> float:
+        counters = self._counters
+        return min(counters[index] for index in self._indexes(hashed))
+
+    def add(self, item: Item, count: float = 1.0):
+        self.add_hashed(item_hash(item), count)
+
+    def estimate(self, item: Item) -> float:
+        return self.estimate_hashed(item_hash(item))
+
+    def decay(self, factor: float):
+        """Scale every counter, e.g. 0.5 once per half-life"""
+        self._counters = array("f", (c * factor for c in self._counters))
+        self.total *= factor
+
+    def merge(self, other: "CountMinSketch"):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge count-min sketches of different shape")
+        counters = self._counters
+        for i, value in enumerate(other._counters):
+            if value:
+                counters[i] += value
+        self.total += other.total
+
+    def copy(self) -> "CountMinSketch":
+        clone = CountMinSketch(self.width, self.depth)
+        clone.total = self.total
+        clone._counters = array("f", self._counters)
+        return clone
+
+    @property
+    def nbytes(self) -> int:
+        return self._counters.itemsize * len(self._counters)
+
+    def to_bytes(self) -> bytes:
+        return self._HEADER.pack(self._MAGIC, self.width, self.depth, self.total) + \
+            self._counters.tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "CountMinSketch":
+        magic, width, depth, total = cls._HEADER.unpack_from(blob)
+        if magic != cls._MAGIC:
+            raise ValueError("Not a count-min sketch")
+        sketch = cls(width, depth)
+        sketch.total = total
+        sketch._counters = array("f")
+        sketch._counters.frombytes(blob[cls._HEADER.size:])
+        if len(sketch._counters) != width * depth:
+            raise ValueError("Truncated count-min sketch")
+        return sketch
+
+
+class HyperLogLog:
+    """
+    HyperLogLog cardinality estimator with ``2**precision`` one-byte registers.
+
+    Standard error is about ``1.04 / sqrt(2**precision)`` (3.3% at p=10).
+    Merging takes the register-wise maximum.
+    """
+
+    _HEADER = struct.Struct("<4sB")
+    _MAGIC = b"ZHLL"
+
+    def __init__(self, precision: int = 10):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self._registers = bytearray(1 << precision)
+
+    def add_hashed(self, hashed: ItemHash):
+        h = hashed[0]
+        p = self.precision
+        index = h >> (64 - p)
+        rest = (h << p) & _MASK64
+        rank = 65 - p if rest == 0 else 65 - rest.bit_length()
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def add(self, item: Item):
+        self.add_hashed(item_hash(item))
+
+    def count(self) -> float:
+        m = len(self._registers)
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction: linear counting
+            return m * math.log(m / zeros)
+        return estimate
+
+    def merge(self, other: "HyperLogLog"):
+        if self.precision != other.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        self._registers = bytearray(map(max, self._registers, other._registers))
+
+    def copy(self) -> "HyperLogLog":
+        clone = HyperLogLog(self.precision)
+        clone._registers = bytearray(self._registers)
+        return clone
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._registers)
+
+    def to_bytes(self) -> bytes:
+        return self._HEADER.pack(self._MAGIC, self.precision) + bytes(self._registers)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "HyperLogLog":
+        magic, precision = cls._HEADER.unpack_from(blob)
+        if magic != cls._MAGIC:
+            raise ValueError("Not a HyperLogLog")
+        sketch = cls(precision)
+        registers = blob[cls._HEADER.size:]
+        if len(registers) != len(sketch._registers):
+            raise ValueError("Truncated HyperLogLog")
+        sketch._registers = bytearray(registers)
+        return sketch
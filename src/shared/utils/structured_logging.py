@@ -0,0 +1,241 @@
+"""
+Non-blocking structured logging for ZeroTrace services
+Records are queued on the caller's thread and formatted/written by a
+background listener, so log calls never block the event loop on I/O
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+# Attributes every LogRecord has; anything else came in through ``extra=``
+_RESERVED_ATTRS = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime", "log_key", "service"}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class LoggingStats:
+    """Thread-safe counters for records that never reached the output"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {
+            "enqueued": 0,
+            "dropped_queue_full": 0,
+            "dropped_rate_limited": 0,
+            "dropped_sampled": 0,
+        }
+
+    def incr(self, name: str):
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            for name in self._counts:
+                self._counts[name] = 0
+
+
+stats = LoggingStats()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as single-line JSON objects.
+
+    ``service`` comes from the record (set by the handler of the logger that
+    emitted it), falling back to the formatter's own ``service_name``.
+    """
+
+    def __init__(self, service_name: Optional[str] = None):
+        super().__init__()
+        self.service_name = service_name
+
+    def format(self, record: logging.LogRecord) -> str:
+        created = datetime.fromtimestamp(record.created, timezone.utc)
+        payload: Dict[str, Any] = {
+            "timestamp": created.isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        service = record.__dict__.get("service") or self.service_name
+        if service:
+            payload["service"] = service
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per-message-key rate limiting and sampling.
+
+    The key is ``extra={"log_key": ...}`` when given, otherwise the logger
+    name plus the unformatted message template, so ``logger.debug("event %s",
+    event_id)`` is one key no matter how many events pass through.
+    DEBUG records are additionally sampled 1-in-``debug_sample_every``.
+    """
+
+    def __init__(
+        self,
+        rate: float = 100.0,
+        burst: int = 200,
+        debug_sample_every: int = 1,
+        max_keys: int = 10000,
+    ):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.debug_sample_every = max(1, debug_sample_every)
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> [tokens, last_refill, debug_seen]
+        self._buckets: "OrderedDict[Tuple[str, Any], list]" = OrderedDict()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        msg = record.msg
+        # Non-string messages (dicts, lists) may be unhashable
+        key = getattr(record, "log_key", None) or (
+            record.name, msg if isinstance(msg, str) else str(msg)
+        )
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(self.burst), now, 0]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+
+            if record.levelno <= logging.DEBUG and self.debug_sample_every > 1:
+                bucket[2] += 1
+                if (bucket[2] - 1) % self.debug_sample_every:
+                    stats.incr("dropped_sampled")
+                    return False
+
+            if self.rate > 0:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+                if bucket[0] < 1.0:
+                    stats.incr("dropped_rate_limited")
+                    return False
+                bucket[0] -= 1.0
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks and never formats on the caller's thread.
+
+    The stock handler formats the message in ``prepare``; here the record is
+    queued as-is and ``getMessage`` runs in the listener thread. Records are
+    dropped (and counted) when ``max_size`` records are pending instead of
+    waiting. A ``queue.SimpleQueue`` is used because its C-level put is
+    much cheaper than ``queue.Queue`` on the hot path.
+
+    The writer thread is shared by every logger in the process, so the
+    handler stamps its ``service_name`` on the record for the formatter.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int = 10000,
+                 service_name: Optional[str] = None):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.service_name = service_name
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if self.service_name and "service" not in record.__dict__:
+            record.service = self.service_name
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self.queue.qsize() >= self.max_size:
+            stats.incr("dropped_queue_full")
+            return
+        self.queue.put_nowait(record)
+        stats.incr("enqueued")
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue: Optional[queue.SimpleQueue] = None
+_listener_lock = threading.Lock()
+
+
+def _start_listener(log_format: str) -> queue.SimpleQueue:
+    """Start the process-wide writer thread once"""
+    global _listener, _queue
+    with _listener_lock:
+        if _listener is None:
+            output = logging.StreamHandler(sys.stdout)
+            if log_format == "json":
+                output.setFormatter(JsonFormatter())
+            else:
+                output.setFormatter(logging.Formatter(TEXT_FORMAT))
+            _queue = queue.SimpleQueue()
+            _listener = logging.handlers.QueueListener(_queue, output)
+            _listener.start()
+            atexit.register(stop_logging)
+        return _queue
+
+
+def stop_logging():
+    """Drain pending records and stop the writer thread"""
+    global _listener, _queue
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+            _queue = None
+
+
+def setup_logging(
+    name: str,
+    level: str = "INFO",
+    log_format: str = "json",
+    queue_size: int = 10000,
+    rate: float = 100.0,
+    burst: int = 200,
+    debug_sample_every: int = 1,
+) -> logging.Logger:
+    """Attach the queued handler to ``name`` and return the logger"""
+    logger = logging.getLogger(name)
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+    if not any(isinstance(h, NonBlockingQueueHandler) for h in logger.handlers):
+        handler = NonBlockingQueueHandler(
+            _start_listener(log_format), queue_size, service_name=name
+        )
+        handler.addFilter(RateLimitFilter(rate, burst, debug_sample_every))
+        logger.addHandler(handler)
+
+    return logger
+
+
+def get_logging_stats() -> Dict[str, int]:
+    """Counters for enqueued and dropped records, plus current queue depth"""
+    snapshot = stats.snapshot()
+    snapshot["queue_depth"] = _queue.qsize() if _queue is not None else 0
+    return snapshot
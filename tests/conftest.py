@@ -9,11 +9,15 @@ Test categories:
 
 import asyncio
 import os
+import sys
 import tempfile
 from pathlib import Path
 
 import pytest
 
+# Services import shared code as ``src.shared...`` (PYTHONPATH=/workspace)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 
 @pytest.fixture(scope="session")
 def event_loop():
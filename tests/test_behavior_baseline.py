@@ -0,0 +1,247 @@
+"""
+Tests for probabilistic sketches and the behavior baseline analyzer
+"""
+
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from src.shared.utils.sketches import CountMinSketch, HyperLogLog
+
+_spec = importlib.util.spec_from_file_location(
+    "behavior_baseline",
+    Path(__file__).parent.parent
+    / "src/analyzers/threat-analyzer/src/behavior_baseline.py",
+)
+behavior_baseline = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(behavior_baseline)
+
+BaselineConfig = behavior_baseline.BaselineConfig
+BehaviorBaseline = behavior_baseline.BehaviorBaseline
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_count_min_never_undercounts_and_merges():
+    a, b = CountMinSketch(512, 4), CountMinSketch(512, 4)
+    for i in range(2000):
+        a.add(f"item-{i % 100}")
+        b.add(f"item-{i % 50}")
+    a.merge(b)
+    restored = CountMinSketch.from_bytes(a.to_bytes())
+    assert restored.estimate("item-7") >= 60
+    assert restored.estimate("item-7") <= 60 + 0.01 * restored.total
+    assert restored.estimate("never-seen") <= 0.01 * restored.total
+
+    with pytest.raises(ValueError):
+        a.merge(CountMinSketch(256, 4))
+
+
+def test_hyperloglog_accuracy_and_merge():
+    a, b = HyperLogLog(12), HyperLogLog(12)
+    for i in range(30000):
+        a.add(f"a{i}")
+        b.add(f"b{i}")
+    assert a.count() == pytest.approx(30000, rel=0.05)
+    a.merge(HyperLogLog.from_bytes(b.to_bytes()))
+    assert a.count() == pytest.approx(60000, rel=0.05)
+    small = HyperLogLog(10)
+    for i in range(10):
+        small.add(str(i))
+    assert small.count() == pytest.approx(10, abs=1)
+
+
+def process_event(hostname, name, exe=None, pid=100, ppid=1):
+    return {
+        "event_id": f"{hostname}-{name}-{pid}",
+        "event_type": "process.created",
+        "hostname": hostname,
+        "data": {"pid": pid, "ppid": ppid, "process_name": name,
+                 "executable_path": exe or f"/usr/bin/{name}", "command_line": name},
+    }
+
+
+def warm_fleet(baseline, hosts=50, rounds=100):
+    for _ in range(rounds):
+        for h in range(hosts):
+            for name in ("bash", "sshd", "cron"):
+                baseline.observe(process_event(f"host-{h}", name))
+
+
+def test_rare_on_host_and_fleet_is_scored():
+    baseline = BehaviorBaseline(BaselineConfig(min_host_events=100), clock=FakeClock())
+    warm_fleet(baseline)
+
+    assert baseline.observe(process_event("host-1", "bash")) == []
+    rare = baseline.observe(process_event("host-1", "xmrig", exe="/tmp/.x/xmrig"))
+    assert {tuple(r["feature"]) for r in rare} == {
+        ("process", "xmrig"), ("executable", "/tmp/.x/xmrig"),
+    }
+    assert all(r["score"] > 0.9 for r in rare)
+    # Now known on this host
+    assert baseline.observe(process_event("host-1", "xmrig", exe="/tmp/.x/xmrig")) == []
+
+
+def test_feature_common_across_fleet_is_not_rare():
+    baseline = BehaviorBaseline(BaselineConfig(min_host_events=100), clock=FakeClock())
+    warm_fleet(baseline)
+    for h in range(10):
+        baseline.observe(process_event(f"host-{h}", "node"))
+    assert baseline.observe(process_event("host-20", "node")) == []
+
+
+def test_decay_forgets_old_behavior():
+    clock = FakeClock()
+    config = BaselineConfig(min_host_events=10, window_seconds=10, decay_factor=0.5,
+                            max_fleet_prevalence=1.0)
+    baseline = BehaviorBaseline(config, clock=clock)
+    warm_fleet(baseline, hosts=1, rounds=50)
+    baseline.observe(process_event("host-0", "backup"))
+    assert baseline.observe(process_event("host-0", "backup")) == []
+
+    clock.now = 100
+    warm_fleet(baseline, hosts=1, rounds=50)
+    assert baseline.observe(process_event("host-0", "backup")) != []
+
+
+def test_checkpoint_and_merge_preserve_state(temp_dir):
+    clock = FakeClock()
+    config = BaselineConfig(min_host_events=100)
+    replica_a = BehaviorBaseline(config, clock=clock)
+    replica_b = BehaviorBaseline(config, clock=clock)
+    warm_fleet(replica_a, hosts=25)
+    for _ in range(100):
+        for h in range(25, 50):
+            replica_b.observe(process_event(f"host-{h}", "bash"))
+
+    path = str(temp_dir / "baseline.ckpt")
+    replica_b.save_checkpoint(path)
+    replica_a.merge(BehaviorBaseline.load_checkpoint(path, config, clock=clock))
+
+    assert len(replica_a.hosts) == 50
+    assert replica_a.fleet_hosts.count() == pytest.approx(50, abs=2)
+    assert replica_a.observe(process_event("host-30", "bash")) == []
+    assert replica_a.observe(process_event("host-30", "mimikatz")) != []
+
+
+def busy_host(config, names=3000):
+    """One host that has run ``names`` distinct programs (two features each)"""
+    baseline = BehaviorBaseline(config, clock=FakeClock())
+    for i in range(names):
+        baseline.observe(process_event("build-01", f"tool-{i}"))
+    return baseline
+
+
+def new_feature_recall(baseline, probes=200):
+    found = 0
+    for i in range(probes):
+        rare = baseline.observe(process_event("build-01", f"new-{i}"))
+        found += ["process", f"new-{i}"] in [r["feature"] for r in rare]
+    return found / probes
+
+
+def test_new_features_found_on_host_with_thousands_of_features():
+    options = dict(min_host_events=100, max_fleet_prevalence=1.0)
+    sized = busy_host(BaselineConfig(expected_host_features=8000, **options))
+    assert new_feature_recall(sized) >= 0.95
+    assert sized.saturated_hosts() == {}
+
+    # A sketch sized for far fewer features is full and hides new behavior
+    undersized = busy_host(BaselineConfig(expected_host_features=500, **options))
+    assert new_feature_recall(undersized) < 0.5
+    assert undersized.saturated_hosts()["build-01"] == pytest.approx(6000, rel=0.2)
+
+
+def test_expected_host_features_from_env(monkeypatch):
+    monkeypatch.setenv("BASELINE_EXPECTED_HOST_FEATURES", "8000")
+    config = BaselineConfig.from_env()
+    assert config.expected_host_features == 8000
+    assert config.host_width == behavior_baseline.sketch_width(8000, config.depth)
+    assert BaselineConfig(host_width=1024).host_width == 1024
+
+
+def test_merge_decays_older_replica_and_copies_hosts():
+    config = BaselineConfig(window_seconds=10, decay_factor=0.5)
+    old_clock, new_clock = FakeClock(), FakeClock()
+    new_clock.now = 30
+    older = BehaviorBaseline(config, clock=old_clock)
+    newer = BehaviorBaseline(config, clock=new_clock)
+    for h in range(8):
+        older.observe(process_event(f"host-{h}", "bash"))
+    newer.observe(process_event("host-0", "bash"))
+
+    newer.merge(older)
+    # The older side's counts are three windows stale: 8 * 0.5**3 + 1
+    assert newer.fleet_prevalence.estimate("process\x1fbash") == pytest.approx(2)
+    assert newer.hosts["host-0"].counts.estimate("process\x1fbash") == \
+        pytest.approx(1 + 0.5 ** 3)
+    assert newer.window == 3
+
+    newer.observe(process_event("host-5", "nc"))
+    assert newer.hosts["host-5"] is not older.hosts["host-5"]
+    assert older.hosts["host-5"].counts.estimate("process\x1fnc") == 0
+    assert older.hosts["host-5"].window == 0
+
+
+def test_analyzer_builds_low_anomaly_alert(temp_dir, mock_env):
+    analyzer = behavior_baseline.BehaviorBaselineAnalyzer()
+    analyzer.baseline = BehaviorBaseline(
+        BaselineConfig(min_host_events=100), clock=FakeClock()
+    )
+    warm_fleet(analyzer.baseline)
+    alert = asyncio.run(analyzer.analyze_event(process_event("host-3", "nc")))
+    assert alert["routing_key"] == "alerts.low.behavior"
+    assert alert["severity"] == "low"
+    assert alert["data"]["score"] > 0.9
+    assert alert["data"]["host_saturated"] is False
+
+
+def test_snapshot_is_isolated_from_later_events(temp_dir):
+    config = BaselineConfig(min_host_events=100)
+    baseline = BehaviorBaseline(config, clock=FakeClock())
+    warm_fleet(baseline, hosts=10, rounds=5)
+    snapshot = baseline.snapshot()
+    # Events keep arriving while the executor writes the snapshot
+    warm_fleet(baseline, hosts=20, rounds=5)
+
+    path = str(temp_dir / "baseline.ckpt")
+    BehaviorBaseline.write_checkpoint(path, snapshot)
+    restored = BehaviorBaseline.load_checkpoint(path, config, clock=FakeClock())
+    assert len(restored.hosts) == 10
+    assert restored.hosts["host-0"].counts.total == 30
+
+
+def test_checkpoint_loop_survives_failures(temp_dir, mock_env):
+    analyzer = behavior_baseline.BehaviorBaselineAnalyzer()
+    analyzer.baseline = BehaviorBaseline(BaselineConfig(), clock=FakeClock())
+    analyzer.checkpoint_interval = 0
+    analyzer.checkpoint_path = str(temp_dir / "missing-dir" / "baseline.ckpt")
+    analyzer.is_running = True
+    failures = []
+    analyzer.logger.error = lambda *args, **kwargs: failures.append(args)
+
+    async def run():
+        loop_task = asyncio.create_task(analyzer._checkpoint_loop())
+        hosts = 0
+        while len(failures) < 3 or hosts < 3:
+            analyzer.baseline.observe(process_event(f"host-{hosts}", "bash"))
+            hosts += 1
+            await asyncio.sleep(0.001)
+        (temp_dir / "missing-dir").mkdir()
+        while not Path(analyzer.checkpoint_path).exists():
+            await asyncio.sleep(0.001)
+        analyzer.is_running = False
+        await loop_task
+
+    asyncio.run(asyncio.wait_for(run(), timeout=10))
+    assert failures[0][0] == "Baseline checkpoint failed: %s"
+    restored = BehaviorBaseline.load_checkpoint(analyzer.checkpoint_path)
+    assert len(restored.hosts) >= 3
@@ -0,0 +1,80 @@
+"""
+Tests for the Parquet cold-tier event archive
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.shared.utils.event_archive import EventArchive  # noqa: E402
+
+DAY = date(2024, 3, 1)
+
+
+def rows(hosts, per_host, day=DAY, event_type="process.created"):
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    return sorted(
+        (
+            {
+                "id": f"{host}-{day}-{i}",
+                "event_type": event_type,
+                "timestamp": start + timedelta(minutes=i),
+                "source_service": "process-collector",
+                "hostname": host,
+                "data": {"pid": i, "command_line": f"/bin/sh -c job{i}"},
+                "created_at": start + timedelta(minutes=i),
+            }
+            for host in hosts
+            for i in range(per_host)
+        ),
+        key=lambda row: (row["hostname"], row["timestamp"]),
+    )
+
+
+def test_write_and_query_with_predicates(temp_dir):
+    archive = EventArchive(str(temp_dir))
+    archive.write_partition("process.created", DAY, [rows(["web-1", "db-1"], 100)])
+    archive.write_partition(
+        "file.created", DAY, [rows(["web-1"], 10, event_type="file.created")]
+    )
+
+    start = datetime(2024, 3, 1, 0, 30, tzinfo=timezone.utc)
+    end = datetime(2024, 3, 1, 1, 0, tzinfo=timezone.utc)
+    events = archive.query(
+        start, end, event_type="process.created", hostname="web-1", limit=500
+    )
+
+    assert len(events) == 30
+    assert all(e["hostname"] == "web-1" and e["archived"] for e in events)
+    assert events[0]["timestamp"] > events[-1]["timestamp"]
+    assert events[0]["data"]["command_line"].startswith("/bin/sh")
+    assert archive.newest_day() == DAY
+
+
+def test_query_prunes_days_and_handles_empty_archive(temp_dir):
+    archive = EventArchive(str(temp_dir / "missing"))
+    now = datetime.now(timezone.utc)
+    assert archive.query(now - timedelta(days=1), now) == []
+    assert archive.newest_day() is None
+
+    archive = EventArchive(str(temp_dir))
+    assert archive.write_partition("process.created", DAY, [[]]) is None
+    archive.write_partition("process.created", DAY, [rows(["a"], 5)])
+    archive.write_partition("process.created", DAY + timedelta(days=1),
+                            [rows(["a"], 5, day=DAY + timedelta(days=1))])
+    next_day = datetime(2024, 3, 2, tzinfo=timezone.utc)
+    assert len(archive.query(next_day, next_day + timedelta(days=1))) == 5
+
+
+def test_rows_archived_twice_are_returned_once(temp_dir):
+    # A run that dies between the rename and its commit re-exports the day
+    archive = EventArchive(str(temp_dir))
+    archive.write_partition("process.created", DAY, [rows(["a"], 5)])
+    archive.write_partition("process.created", DAY, [rows(["a"], 5)])
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+    events = archive.query(start, start + timedelta(days=1), limit=100)
+    assert sorted(e["id"] for e in events) == sorted(r["id"] for r in rows(["a"], 5))
+    assert len(archive.query(start, start + timedelta(days=1), limit=3)) == 3
@@ -0,0 +1,129 @@
+"""
+Tests for the hash-checker threat feed importer (parsing and validation)
+"""
+
+import gzip
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+_spec = importlib.util.spec_from_file_location(
+    "feed_importer",
+    Path(__file__).parent.parent / "src/analyzers/hash-checker/src/feed_importer.py",
+)
+feed_importer = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(feed_importer)
+
+MD5 = "D41D8CD98F00B204E9800998ECF8427E"
+SHA256 = "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+
+
+def test_normalize_infers_type_and_lowercases():
+    record = feed_importer.normalize_record(
+        {"Hash": f" {MD5} ", "Signature": "Emotet", "severity": "HIGH"}, "feed"
+    )
+    assert record.hash_value == MD5.lower()
+    assert record.hash_type == "md5"
+    assert record.threat_name == "Emotet"
+    assert record.severity == "high"
+
+
+@pytest.mark.parametrize("row", [
+    {"hash": "xyz"},
+    {"hash": "abcd"},
+    {"hash": SHA256, "hash_type": "md5"},
+    {"signature": "no hash"},
+])
+def test_normalize_rejects_invalid_rows(row):
+    with pytest.raises(ValueError):
+        feed_importer.normalize_record(row, "feed")
+
+
+def test_reads_gzip_malwarebazaar_csv_with_comment_header(temp_dir):
+    path = temp_dir / "full.csv.gz"
+    with gzip.open(path, "wt", newline="") as fh:
+        fh.write("#" * 64 + "\r\n")
+        fh.write("# MalwareBazaar full data dump (CSV)                           #\r\n")
+        fh.write("# Last updated: 2024-03-01 00:00:00 UTC                        #\r\n")
+        fh.write("#                                                              #\r\n")
+        fh.write('# "first_seen_utc","sha256_hash","md5_hash","signature"\r\n')
+        fh.write(f'"2024-02-29 23:59:12", "{SHA256}", "{MD5}", "AgentTesla"\r\n')
+        fh.write(f'"2024-02-29 23:58:40", "{"a" * 64}", "{"b" * 32}", "n/a"\r\n')
+        fh.write("#" * 64 + "\r\n")
+    stats = feed_importer.ImportStats()
+    rows = list(feed_importer.iter_feed_rows(path))
+    lines = feed_importer.CopyStream(iter(rows), "bazaar", stats).read()
+
+    assert (stats.rows_read, stats.rows_valid, stats.rows_rejected) == (2, 2, 0)
+    record = feed_importer.normalize_record(rows[0], "bazaar")
+    assert record.hash_value == SHA256
+    assert record.threat_name == "AgentTesla"
+    assert lines.count("\n") == 2
+
+
+def test_reads_plain_csv_header(temp_dir):
+    path = temp_dir / "feed.csv"
+    path.write_text(f"# exported by hand\nmd5,family\n{MD5},Emotet\n")
+    rows = list(feed_importer.iter_feed_rows(path))
+    assert rows == [{"md5": MD5, "family": "Emotet"}]
+
+
+@pytest.mark.parametrize("name,dump", [
+    ("feed.json", lambda rows: json.dumps(rows, indent=2)),
+    ("feed.jsonl", lambda rows: "\n".join(json.dumps(r) for r in rows)),
+])
+def test_reads_json_across_chunk_boundaries(temp_dir, name, dump):
+    rows = [{"hash": f"{i:032x}", "family": "x" * 50} for i in range(2000)]
+    path = temp_dir / name
+    path.write_text(dump(rows))
+    assert list(feed_importer.iter_feed_rows(path)) == rows
+
+
+def test_copy_stream_escapes_and_counts():
+    stats = feed_importer.ImportStats()
+    rows = iter([
+        {"hash": MD5, "signature": "tab\there"},
+        {"hash": "bad"},
+        {"hash": SHA256},
+    ])
+    stream = feed_importer.CopyStream(rows, "feed", stats)
+    chunks = []
+    while True:
+        chunk = stream.read(16)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    lines = "".join(chunks).splitlines()
+
+    assert lines[0].split("\t")[2] == "tab\\there"
+    assert lines[1].split("\t")[2:4] == ["\\N", "\\N"]
+    assert (stats.rows_read, stats.rows_valid, stats.rows_rejected) == (3, 2, 1)
+
+
+def test_malformed_json_line_is_rejected_not_fatal(temp_dir):
+    path = temp_dir / "feed.ndjson"
+    path.write_text("\n".join([
+        json.dumps({"hash": MD5}),
+        '{"hash": bad}',
+        "[1, 2]",
+        json.dumps({"hash": SHA256}),
+    ]) + "\n")
+    stats = feed_importer.ImportStats()
+    stream = feed_importer.CopyStream(feed_importer.iter_feed_rows(path), "feed", stats)
+
+    assert len(stream.read().splitlines()) == 2
+    assert (stats.rows_read, stats.rows_valid, stats.rows_rejected) == (4, 2, 2)
+    assert "line 2: invalid JSON" in stats.rejected_samples[0]
+    assert "line 3: not a JSON object" in stats.rejected_samples[1]
+
+
+def test_malformed_json_array_fails_fast(temp_dir):
+    path = temp_dir / "feed.json"
+    path.write_text('[{"hash": bad}, ' + ", ".join(
+        json.dumps({"hash": f"{i:032x}"}) for i in range(50000)
+    ) + "]")
+    rows = feed_importer.iter_feed_rows(path)
+    with pytest.raises(ValueError, match="malformed JSON feed"):
+        list(rows)
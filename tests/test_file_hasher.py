@@ -0,0 +1,133 @@
+"""
+Tests for single-pass file hashing and the stat-keyed cache
+"""
+
+import asyncio
+import hashlib
+import os
+
+from src.shared.utils.file_hasher import FileHasher, HashCache, hash_file
+
+
+def expected(data):
+    return {
+        "md5": hashlib.md5(data).hexdigest(),
+        "sha1": hashlib.sha1(data).hexdigest(),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+
+
+def test_hash_file_small_large_and_empty(temp_dir):
+    for size in (0, 1000, 3 << 20):
+        path = temp_dir / f"f{size}"
+        data = os.urandom(size)
+        path.write_bytes(data)
+        digests, key = hash_file(str(path), chunk_size=1 << 16)
+        assert digests == expected(data)
+        assert key[2] == size
+
+
+def patch_md5(monkeypatch, on_update):
+    """Make hashlib.md5 call ``on_update`` before each chunk is hashed"""
+    real_md5 = hashlib.md5
+
+    class HookedMd5:
+        def __init__(self):
+            self._md5 = real_md5()
+
+        def update(self, chunk):
+            on_update()
+            self._md5.update(chunk)
+
+        def hexdigest(self):
+            return self._md5.hexdigest()
+
+    monkeypatch.setattr(hashlib, "md5", HookedMd5)
+
+
+def test_file_truncated_while_hashing_is_rehashed(temp_dir, monkeypatch):
+    path = temp_dir / "growing.log"
+    data = os.urandom(8 << 20)
+    path.write_bytes(data)
+    truncated = []
+
+    def truncate_once():
+        if not truncated:
+            truncated.append(True)
+            os.truncate(path, 1000)
+
+    patch_md5(monkeypatch, truncate_once)
+    hasher = FileHasher(max_workers=1, cache_path="")
+    try:
+        digests = hasher.hash(str(path))
+    finally:
+        hasher.close()
+    monkeypatch.undo()
+
+    # The first, torn read is discarded; the retry sees the new content
+    assert digests == expected(data[:1000])
+    assert len(hasher.cache) == 1
+
+
+def test_file_that_keeps_changing_yields_no_digest(temp_dir, monkeypatch):
+    path = temp_dir / "busy.log"
+    path.write_bytes(os.urandom(4 << 20))
+    writes = iter(range(1, 1 << 20))
+
+    def touch():
+        # A writer rewriting the file in place: same size, new mtime
+        os.utime(path, ns=(0, next(writes) * 1_000_000_000))
+
+    patch_md5(monkeypatch, touch)
+    hasher = FileHasher(max_workers=1, cache_path="")
+    try:
+        assert hasher.hash(str(path)) is None
+    finally:
+        hasher.close()
+    assert hasher.stats.unstable == 1
+    assert len(hasher.cache) == 0
+
+
+def test_cache_hits_until_file_changes(temp_dir):
+    path = temp_dir / "binary"
+    path.write_bytes(b"v1")
+    hasher = FileHasher(max_workers=2, cache_path="")
+    try:
+        assert hasher.hash(str(path)) == expected(b"v1")
+        assert hasher.hash(str(path)) == expected(b"v1")
+        assert (hasher.stats.cache_hits, hasher.stats.cache_misses) == (1, 1)
+
+        path.write_bytes(b"v2 longer")
+        assert hasher.hash(str(path)) == expected(b"v2 longer")
+        assert hasher.stats.cache_misses == 2
+        assert hasher.hash(str(temp_dir / "missing")) is None
+    finally:
+        hasher.close()
+
+
+def test_cache_lru_and_persistence(temp_dir):
+    cache_file = temp_dir / "hash-cache.json"
+    cache = HashCache(max_entries=2, path=str(cache_file))
+    for i in range(3):
+        cache.put((1, i, 10, 0), expected(bytes([i])))
+    assert cache.get((1, 0, 10, 0)) is None
+    cache.save()
+
+    reloaded = HashCache(max_entries=2, path=str(cache_file))
+    assert len(reloaded) == 2
+    assert reloaded.get((1, 2, 10, 0)) == expected(bytes([2]))
+
+
+def test_enrich_event_fills_hashes(temp_dir):
+    path = temp_dir / "dropper.exe"
+    path.write_bytes(b"MZ payload")
+    hasher = FileHasher(max_workers=1, cache_path="")
+    event = {
+        "event_type": "file.created",
+        "data": {"file_path": str(path), "action": "created"},
+    }
+    try:
+        asyncio.run(hasher.enrich_event(event))
+    finally:
+        hasher.close()
+    assert event["data"]["hashes"] == expected(b"MZ payload")
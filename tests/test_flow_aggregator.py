@@ -0,0 +1,138 @@
+"""
+Tests for collector-side network flow aggregation
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from src.shared.utils.flow_aggregator import FlowAggregator
+
+SOURCE = {"service": "network-collector", "version": "1.0.0", "hostname": "host-a"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def connection_event(event_type, dst_ip="10.0.0.5", dst_port=443, src_port=50000,
+                     hostname="host-a", **data):
+    return {
+        "event_id": "x",
+        "timestamp": datetime(2024, 1, 1) + timedelta(seconds=src_port - 50000),
+        "event_type": event_type,
+        "source": SOURCE,
+        "hostname": hostname,
+        "data": {
+            "protocol": "TCP",
+            "source_ip": "10.0.0.1",
+            "source_port": src_port,
+            "destination_ip": dst_ip,
+            "destination_port": dst_port,
+            "process_id": 42,
+            "process_name": "curl",
+            **data,
+        },
+    }
+
+
+def test_connections_merge_into_one_flow():
+    aggregator = FlowAggregator(SOURCE, flush_interval=60, clock=FakeClock())
+    for port in range(50000, 50010):
+        aggregator.add(
+            connection_event("network.connection.established", src_port=port)
+        )
+        aggregator.add(connection_event(
+            "network.connection.closed", src_port=port,
+            bytes_sent=100, bytes_received=1000,
+        ))
+
+    flows = aggregator.flush()
+    assert len(flows) == 1
+    data = flows[0]["data"]
+    assert flows[0]["event_type"] == "network.flow"
+    # The first established event was passed through and is not in the totals
+    assert data["event_count"] == 19
+    assert data["established_count"] == 9
+    assert data["closed_count"] == 10
+    assert data["bytes_sent"] == 1000
+    assert data["bytes_received"] == 10000
+    assert data["first_seen"] < data["last_seen"]
+    assert data["process_id"] == 42
+
+
+def test_passed_through_bytes_are_not_counted_twice():
+    aggregator = FlowAggregator(SOURCE, flush_interval=60, clock=FakeClock())
+    published = aggregator.add(connection_event(
+        "network.connection.closed", bytes_sent=500, process_id=None, process_name=None
+    ))
+    published += aggregator.add(connection_event(
+        "network.connection.closed", src_port=50001, bytes_sent=300,
+        process_id=None, process_name=None,
+    ))
+    published += aggregator.flush()
+
+    assert sum(e["data"]["bytes_sent"] for e in published) == 800
+    flow = published[-1]["data"]
+    assert "process_id" not in flow and "process_name" not in flow
+
+
+def test_first_seen_destination_is_passed_through():
+    aggregator = FlowAggregator(SOURCE, flush_interval=60, clock=FakeClock())
+    first = connection_event("network.connection.established")
+
+    assert aggregator.add(first) == [first]
+    repeat = connection_event("network.connection.established", src_port=50001)
+    assert aggregator.add(repeat) == []
+    # Same destination on another host is new for that host
+    other = connection_event("network.connection.established", hostname="host-b")
+    assert aggregator.add(other) == [other]
+
+
+def test_flush_interval_and_memory_cap():
+    clock = FakeClock()
+    aggregator = FlowAggregator(SOURCE, flush_interval=10, max_flows=2, clock=clock)
+    for port in (1, 2, 3):
+        # First contact is passed through without opening a flow
+        event = connection_event("network.connection.established", dst_port=port)
+        aggregator.add(event)
+    assert len(aggregator) == 0
+    aggregator.add(connection_event("network.connection.closed", dst_port=1))
+    aggregator.add(connection_event("network.connection.closed", dst_port=2))
+
+    out = aggregator.add(connection_event("network.connection.closed", dst_port=3))
+    evicted = [e for e in out if e["event_type"] == "network.flow"]
+    assert [e["data"]["destination_port"] for e in evicted] == [1]
+    assert len(aggregator) == 2
+
+    assert aggregator.poll() == []
+    clock.now = 10
+    assert len(aggregator.poll()) == 2
+    assert len(aggregator) == 0
+
+
+def test_non_connection_events_are_not_held():
+    aggregator = FlowAggregator(SOURCE, clock=FakeClock())
+    event = {"event_type": "process.created", "hostname": "host-a", "data": {}}
+    assert aggregator.add(event) == [event]
+    assert aggregator.stats.events_in == 0
+
+
+def test_volume_reduction_on_synthetic_traffic():
+    rng = random.Random(7)
+    aggregator = FlowAggregator(SOURCE, flush_interval=60, clock=FakeClock())
+    published = 0
+    for i in range(5000):
+        dst = f"10.1.0.{rng.randrange(20)}"
+        port = 50000 + i
+        published += len(aggregator.add(connection_event(
+            "network.connection.established", dst_ip=dst, src_port=port)))
+        published += len(aggregator.add(connection_event(
+            "network.connection.closed", dst_ip=dst, src_port=port, bytes_sent=10)))
+    published += len(aggregator.flush())
+
+    assert published == aggregator.stats.events_out
+    assert aggregator.stats.reduction_ratio > 0.99
@@ -0,0 +1,132 @@
+"""
+Tests for the indexed command-line / path search query builder
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.api.search import (
+    SearchField,
+    SearchMode,
+    UnindexableQuery,
+    build_search_query,
+    check_indexable,
+    escape_like,
+    normalize,
+    required_literals,
+)
+
+END = datetime(2024, 3, 1, tzinfo=timezone.utc)
+START = END - timedelta(days=1)
+
+
+def test_normalize_matches_ingest():
+    assert normalize("PowerShell.exe  -NoP\t-Enc") == "powershell.exe -nop -enc"
+
+
+def test_escape_like():
+    assert escape_like(r"50%_c:\tmp") == r"50\%\_c:\\tmp"
+
+
+@pytest.mark.parametrize("query", ["", "ab", "  a  ", "///", "---", "a.b.c", "__%"])
+@pytest.mark.parametrize("mode", [SearchMode.SUBSTRING, SearchMode.PREFIX])
+def test_rejects_strings_without_trigrams(query, mode):
+    with pytest.raises(UnindexableQuery):
+        check_indexable(query, mode)
+
+
+@pytest.mark.parametrize("query", ["cmd", "/tmp/", "-enc", "C:\\Windows"])
+def test_accepts_strings_with_trigrams(query):
+    assert check_indexable(query, SearchMode.SUBSTRING) == normalize(query)
+
+
+def test_rejects_overlong_pattern():
+    with pytest.raises(UnindexableQuery):
+        check_indexable("a" * 300, SearchMode.SUBSTRING)
+
+
+@pytest.mark.parametrize("pattern", [
+    "(unclosed",
+    ".*",
+    "[a-z]+\\d{3}",
+    "ab.*cd",
+    "(mimikatz|sc)",
+    "x?y?z?",
+    r"\.\.\.",
+    r"/// ---",
+    r"(cmd|\.\.\.)\.\d",
+])
+def test_rejects_unindexable_regexes(pattern):
+    with pytest.raises(UnindexableQuery):
+        check_indexable(pattern, SearchMode.REGEX)
+
+
+@pytest.mark.parametrize("pattern", [
+    "(?P<tool>mimikatz)",
+    "(?i)mimikatz",
+    "(?i:mimikatz)",
+    "(?>mimikatz)",
+    "mimikatz.*+",
+    r"\bmimikatz\b",
+    r"mimikatz\B",
+    "(-)?(?(1)mimikatz|procdump)",
+    r"\N{LATIN SMALL LETTER M}imikatz",
+])
+def test_rejects_regex_syntax_postgres_lacks(pattern):
+    with pytest.raises(UnindexableQuery, match="not supported by the database"):
+        check_indexable(pattern, SearchMode.REGEX)
+
+
+@pytest.mark.parametrize("pattern, literal", [
+    (r"powershell.*-enc", "powershell"),
+    (r"(mimikatz|procdump)\.exe", "mimikatz"),
+    (r"CertUtil(\.exe)? -urlcache", " -urlcache"),
+    (r"(?:vss){1,3}admin", "vss"),
+    (r"(mimikatz)\.\1", "mimikatz"),
+    (r"(?<!\\)mimikatz", "mimikatz"),
+])
+def test_accepts_regexes_with_required_literal(pattern, literal):
+    assert check_indexable(pattern, SearchMode.REGEX) == pattern
+    assert literal in required_literals(pattern)
+
+
+def test_substring_query():
+    sql, params = build_search_query(
+        "Invoke-Mimikatz", SearchField.COMMAND_LINE, SearchMode.SUBSTRING, START, END,
+        hostname="ws-01", limit=50,
+    )
+    assert "command_line LIKE %(pattern)s" in sql
+    assert "hostname = %(hostname)s" in sql
+    assert params["pattern"] == "%invoke-mimikatz%"
+    expected = {"hostname": "ws-01", "limit": 50, "start": START, "end": END}
+    assert params == {**params, **expected}
+
+
+def test_prefix_query_escapes_wildcards():
+    sql, params = build_search_query(
+        r"C:\Users\a_b", SearchField.FILE_PATH, SearchMode.PREFIX, START, END,
+    )
+    assert "file_path LIKE %(pattern)s" in sql
+    assert "hostname" not in params
+    assert params["pattern"] == r"c:\\users\\a\_b%"
+
+
+def test_regex_query_is_case_insensitive():
+    sql, params = build_search_query(
+        r"rundll32.*,#\d+", SearchField.COMMAND_LINE, SearchMode.REGEX, START, END,
+    )
+    assert "command_line ~* %(pattern)s" in sql
+    assert params["pattern"] == r"rundll32.*,#\d+"
+
+
+def test_time_range_is_bounded(monkeypatch):
+    monkeypatch.setenv("SEARCH_MAX_RANGE_DAYS", "7")
+    with pytest.raises(UnindexableQuery):
+        build_search_query("cmd.exe", SearchField.COMMAND_LINE, SearchMode.SUBSTRING,
+                           END - timedelta(days=8), END)
+    with pytest.raises(UnindexableQuery):
+        build_search_query("cmd.exe", SearchField.COMMAND_LINE, SearchMode.SUBSTRING,
+                           END, START)
+    build_search_query("cmd.exe", SearchField.COMMAND_LINE, SearchMode.SUBSTRING,
+                       END - timedelta(days=7), END)
@@ -0,0 +1,165 @@
+"""
+Tests for host-affinity sharding of analyzer consumers
+"""
+
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+from src.shared.utils.service_discovery import Topics
+from src.shared.utils.sharding import (
+    PartitionCoordinator,
+    PartitionedConsumer,
+    ShardRouter,
+    partition_for_host,
+)
+
+PARTITIONS = 64
+HOSTS = [f"host-{i:04d}" for i in range(2000)]
+
+
+class LocalBroker:
+    """In-memory stand-in for the events exchange with one queue per routing key"""
+
+    def __init__(self):
+        self.queues = defaultdict(deque)
+
+    def publish(self, routing_key, event):
+        self.queues[routing_key].append(event)
+
+
+class CountingAnalyzer(PartitionedConsumer):
+    """Keeps a per-host event counter, like a process-tree or baseline analyzer"""
+
+    def __init__(self, replica_id, router, cost=0.0):
+        super().__init__(replica_id, router)
+        self.cost = cost
+        self.processed = 0
+
+    def drain(self, broker, topic, budget=None):
+        for partition in sorted(self.assigned_partitions):
+            queue = broker.queues[self.router.partition_key(topic, partition)]
+            while queue and (budget is None or budget > 0):
+                event = queue.popleft()
+                if self.cost:
+                    # Stands in for per-event I/O (lookups, writes) that
+                    # releases the GIL like a real analyzer would
+                    time.sleep(self.cost)
+                state = self.host_state(event["hostname"])
+                state["count"] = state.get("count", 0) + 1
+                self.processed += 1
+                if budget is not None:
+                    budget -= 1
+
+
+def publish_events(broker, router, per_host):
+    topic = Topics.EVENTS_RAW_PROCESSES
+    for i in range(per_host):
+        for host in HOSTS:
+            key = router.routing_key(topic, host)
+            broker.publish(key, {"hostname": host, "seq": i})
+
+
+def test_partitioned_key_matches_binding_pattern():
+    router = ShardRouter(PARTITIONS)
+    key = router.routing_key(Topics.EVENTS_RAW_NETWORK, "web-01")
+    assert key.startswith(Topics.EVENTS_RAW_NETWORK + ".p")
+    assert Topics.binding_pattern(Topics.EVENTS_RAW_NETWORK) == "events.raw.network.#"
+
+
+def test_partition_count_growth_moves_few_hosts():
+    moved = sum(partition_for_host(h, 64) != partition_for_host(h, 65) for h in HOSTS)
+    assert moved < len(HOSTS) * 0.05
+
+
+def test_assignment_is_balanced_and_sticky():
+    router = ShardRouter(PARTITIONS)
+    coordinator = PartitionCoordinator(PARTITIONS)
+    replicas = [CountingAnalyzer(f"r{i}", router) for i in range(5)]
+    for replica in replicas:
+        coordinator.join(replica)
+
+    sizes = sorted(len(p) for p in coordinator.assignment.values())
+    assert sizes[-1] - sizes[0] <= 1
+    assert sum(sizes) == PARTITIONS
+
+    moves = coordinator.join(CountingAnalyzer("r5", router))
+    # Only the newcomer's share moves
+    assert len(moves) == PARTITIONS // 6
+    assert all(new == "r5" for _, _, new in moves)
+
+
+def run_replicas(replica_count, per_event_cost):
+    """Drain one batch of events with replicas running concurrently; wall time"""
+    router = ShardRouter(PARTITIONS)
+    coordinator = PartitionCoordinator(PARTITIONS)
+    broker = LocalBroker()
+    replicas = [
+        CountingAnalyzer(f"r{i}", router, cost=per_event_cost)
+        for i in range(replica_count)
+    ]
+    for replica in replicas:
+        coordinator.join(replica)
+    publish_events(broker, router, per_host=1)
+
+    threads = [
+        threading.Thread(
+            target=replica.drain, args=(broker, Topics.EVENTS_RAW_PROCESSES)
+        )
+        for replica in replicas
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    assert sum(r.processed for r in replicas) == len(HOSTS)
+    owners = {}
+    for replica in replicas:
+        for hosts in replica.partition_state.values():
+            for host in hosts:
+                assert owners.setdefault(host, replica.replica_id) == replica.replica_id
+    return elapsed
+
+
+def test_throughput_scales_with_replicas():
+    cost = 0.0002
+    single = run_replicas(1, cost)
+    for replica_count in (2, 4, 8):
+        speedup = single / run_replicas(replica_count, cost)
+        assert speedup >= 0.7 * replica_count, (replica_count, speedup)
+
+
+def test_state_handoff_on_join_and_leave():
+    router = ShardRouter(PARTITIONS)
+    coordinator = PartitionCoordinator(PARTITIONS)
+    broker = LocalBroker()
+    topic = Topics.EVENTS_RAW_PROCESSES
+    replicas = {f"r{i}": CountingAnalyzer(f"r{i}", router) for i in range(3)}
+    for replica in replicas.values():
+        coordinator.join(replica)
+
+    def drain_all():
+        for replica in list(replicas.values()):
+            replica.drain(broker, topic, budget=1500)
+
+    publish_events(broker, router, per_host=2)
+    drain_all()
+    replicas["r3"] = CountingAnalyzer("r3", router)
+    coordinator.join(replicas["r3"])
+    publish_events(broker, router, per_host=2)
+    drain_all()
+    coordinator.leave("r0")
+    del replicas["r0"]
+    publish_events(broker, router, per_host=2)
+    while any(broker.queues.values()):
+        drain_all()
+
+    counts = Counter()
+    for replica in replicas.values():
+        for hosts in replica.partition_state.values():
+            for host, state in hosts.items():
+                counts[host] += state["count"]
+    assert counts == Counter({host: 6 for host in HOSTS})
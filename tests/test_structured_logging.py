@@ -0,0 +1,88 @@
+"""
+Tests for non-blocking structured logging
+"""
+
+import json
+import logging
+import queue
+
+from src.shared.utils import structured_logging
+from src.shared.utils.structured_logging import (
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    RateLimitFilter,
+)
+
+
+def make_record(msg, *args, level=logging.INFO, **extra):
+    record = logging.LogRecord("svc", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    record = make_record("event %s", "abc", hostname="host-a")
+    payload = json.loads(JsonFormatter("hash-checker").format(record))
+    assert payload["message"] == "event abc"
+    assert payload["service"] == "hash-checker"
+    assert payload["hostname"] == "host-a"
+    assert payload["level"] == "INFO"
+
+
+def test_service_comes_from_the_emitting_handler():
+    log_queue = queue.SimpleQueue()
+    formatter = JsonFormatter()
+    for service in ("hash-checker", "behavior-baseline"):
+        NonBlockingQueueHandler(log_queue, service_name=service).handle(
+            make_record("started")
+        )
+    services = [
+        json.loads(formatter.format(log_queue.get_nowait()))["service"]
+        for _ in range(2)
+    ]
+    assert services == ["hash-checker", "behavior-baseline"]
+
+
+def test_queue_handler_defers_formatting_and_counts_drops():
+    structured_logging.stats.reset()
+    handler = NonBlockingQueueHandler(queue.SimpleQueue(), max_size=1)
+    record = make_record("event %s", "abc")
+
+    handler.handle(record)
+    handler.handle(make_record("overflow"))
+
+    queued = handler.queue.get_nowait()
+    assert queued is record
+    assert queued.args == ("abc",)
+    counters = structured_logging.get_logging_stats()
+    assert counters["enqueued"] == 1
+    assert counters["dropped_queue_full"] == 1
+
+
+def test_rate_limit_is_per_message_key():
+    structured_logging.stats.reset()
+    limiter = RateLimitFilter(rate=0.001, burst=3)
+    hot = [limiter.filter(make_record("event %s", i)) for i in range(10)]
+    assert hot.count(True) == 3
+    assert limiter.filter(make_record("other message"))
+    assert limiter.filter(make_record("x", log_key="k"))
+    assert structured_logging.get_logging_stats()["dropped_rate_limited"] == 7
+
+
+def test_debug_sampling():
+    structured_logging.stats.reset()
+    limiter = RateLimitFilter(rate=0, debug_sample_every=10)
+    kept = [
+        limiter.filter(make_record("event %s", i, level=logging.DEBUG))
+        for i in range(100)
+    ]
+    assert kept.count(True) == 10
+    assert limiter.filter(make_record("info line"))
+    assert structured_logging.get_logging_stats()["dropped_sampled"] == 90
+
+
+def test_non_string_messages_are_rate_limited_not_rejected():
+    limiter = RateLimitFilter(rate=0.001, burst=1)
+    assert limiter.filter(make_record({"k": 1}))
+    assert not limiter.filter(make_record({"k": 1}))
+    assert limiter.filter(make_record(["a", "b"]))
@@ -0,0 +1,91 @@
+"""
+Behavior baseline benchmark
+Feeds synthetic process/network events through BehaviorBaseline and
+reports update rate, memory per host, checkpoint size and merge cost
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+_spec = importlib.util.spec_from_file_location(
+    "behavior_baseline", ROOT / "src/analyzers/threat-analyzer/src/behavior_baseline.py"
+)
+behavior_baseline = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(behavior_baseline)
+
+PROCESSES = [f"proc{i}" for i in range(300)]
+
+
+def events(hosts: int, count: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(count):
+        host = f"host-{rng.randrange(hosts):05d}"
+        name = PROCESSES[min(int(rng.paretovariate(1.1)), len(PROCESSES) - 1)]
+        if i % 2:
+            data = {"pid": rng.randrange(2, 60000), "ppid": rng.randrange(1, 60000),
+                    "process_name": name, "executable_path": f"/usr/bin/{name}"}
+            yield {"event_type": "process.created", "hostname": host,
+                   "event_id": str(i), "data": data}
+        else:
+            dst = min(int(rng.paretovariate(1.1)), 5000)
+            data = {"process_name": name,
+                    "destination_port": 443 if dst % 4 else 8000 + dst,
+                    "destination_ip": f"10.{dst // 256}.{dst % 256}.1"}
+            yield {"event_type": "network.flow", "hostname": host,
+                   "event_id": str(i), "data": data}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--hosts", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=300_000)
+    args = parser.parse_args()
+
+    config = behavior_baseline.BaselineConfig(min_host_events=50)
+    baseline = behavior_baseline.BehaviorBaseline(config)
+    rare = 0
+    started = time.perf_counter()
+    for event in events(args.hosts, args.events, seed=1):
+        rare += bool(baseline.observe(event))
+    elapsed = time.perf_counter() - started
+
+    per_host = baseline.host_memory_bytes()
+    fleet = baseline.fleet_prevalence.nbytes + baseline.fleet_hosts.nbytes
+    print(f"{args.events:,} events over {len(baseline.hosts):,} hosts: "
+          f"{args.events / elapsed:,.0f} events/s, {rare:,} events with rare features")
+    print(f"sketch memory per host: {per_host / 1024:.1f} KiB "
+          f"(fleet sketches {fleet / 1024:.0f} KiB, independent of fleet size)")
+    print(f"fleet size estimate: {baseline.fleet_size:,.0f} "
+          f"(actual {len(baseline.hosts):,})")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "baseline.ckpt")
+        started = time.perf_counter()
+        baseline.save_checkpoint(path)
+        saved = time.perf_counter() - started
+        started = time.perf_counter()
+        restored = behavior_baseline.BehaviorBaseline.load_checkpoint(path, config)
+        loaded = time.perf_counter() - started
+        print(f"checkpoint: {os.path.getsize(path) / 1e6:.1f} MB, "
+              f"save {saved * 1e3:.0f} ms, load {loaded * 1e3:.0f} ms")
+
+    other = behavior_baseline.BehaviorBaseline(config)
+    for event in events(args.hosts, args.events // 10, seed=2):
+        other.observe(event)
+    started = time.perf_counter()
+    restored.merge(other)
+    print(f"merge replica with {len(other.hosts):,} overlapping hosts: "
+          f"{(time.perf_counter() - started) * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
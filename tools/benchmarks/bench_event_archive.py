@@ -0,0 +1,112 @@
+"""
+Cold-tier archive benchmark
+Writes a month of synthetic events into the Parquet archive and reports
+compression against the JSON size of the same rows (a lower bound for the
+JSONB heap plus GIN index they occupy in PostgreSQL) and query latency
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.shared.utils.event_archive import EventArchive  # noqa: E402
+
+EVENT_TYPES = ["process.created", "network.flow", "file.modified", "process.terminated"]
+BINARIES = [
+    "/usr/bin/python3", "/bin/bash", "/usr/sbin/sshd", "/usr/bin/curl",
+    "/opt/app/server",
+]
+
+
+def day_rows(day: date, hosts: int, events_per_day: int, event_type: str,
+             rng: random.Random):
+    start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    rows = []
+    for i in range(events_per_day):
+        host = f"host-{rng.randrange(hosts):04d}"
+        binary = rng.choice(BINARIES)
+        ts = start + timedelta(seconds=rng.randrange(86400))
+        rows.append({
+            "id": f"{day}-{event_type}-{i}",
+            "event_type": event_type,
+            "timestamp": ts,
+            "source_service": "collector",
+            "hostname": host,
+            "data": {
+                "pid": rng.randrange(1, 65535),
+                "ppid": rng.randrange(1, 65535),
+                "process_name": binary.rsplit("/", 1)[1],
+                "executable_path": binary,
+                "command_line": f"{binary} --job {rng.randrange(1000)} --host {host}",
+                "user": rng.choice(["root", "www-data", "app"]),
+            },
+            "created_at": ts,
+        })
+    rows.sort(key=lambda r: (r["hostname"], r["timestamp"]))
+    return rows
+
+
+def timed(label, fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<44} {best * 1e3:8.1f} ms  ({len(result)} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--events-per-day", type=int, default=50_000,
+                        help="per event type")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    first_day = date(2024, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = EventArchive(tmp)
+        json_bytes = rows_total = 0
+        started = time.perf_counter()
+        for offset in range(args.days):
+            day = first_day + timedelta(days=offset)
+            for event_type in EVENT_TYPES:
+                rows = day_rows(day, args.hosts, args.events_per_day, event_type, rng)
+                json_bytes += sum(len(json.dumps(r, default=str)) for r in rows)
+                rows_total += len(rows)
+                archive.write_partition(event_type, day, [rows])
+        elapsed = time.perf_counter() - started
+        parquet_bytes = sum(p.stat().st_size for p in Path(tmp).rglob("*.parquet"))
+
+        print(f"events: {rows_total:,} over {args.days} days, "
+              f"written in {elapsed:.1f}s ({rows_total / elapsed:,.0f} rows/s)")
+        print(f"JSON {json_bytes / 1e6:,.0f} MB -> "
+              f"Parquet/zstd {parquet_bytes / 1e6:,.1f} MB "
+              f"(ratio {json_bytes / parquet_bytes:.1f}x)")
+
+        month_start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        month_end = month_start + timedelta(days=args.days)
+        mid = month_start + timedelta(days=args.days // 2)
+        next_day = mid + timedelta(days=1)
+        timed("one host, one day, all types",
+              lambda: archive.query(mid, next_day, hostname="host-0042", limit=10_000))
+        timed("one host, whole month, one type",
+              lambda: archive.query(month_start, month_end, "process.created",
+                                    "host-0042", 10_000))
+        timed("one type, one hour, all hosts (limit 100)",
+              lambda: archive.query(mid, mid + timedelta(hours=1), "network.flow",
+                                    limit=100))
+        timed("whole month, all hosts (limit 100)",
+              lambda: archive.query(month_start, month_end, limit=100), repeat=1)
+
+
+if __name__ == "__main__":
+    main()
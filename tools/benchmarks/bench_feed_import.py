@@ -0,0 +1,74 @@
+"""
+Threat feed import benchmark
+Generates a synthetic gzipped CSV feed and measures parse/validate/COPY
+serialization throughput and peak memory; with --dsn it runs the full
+import (staging COPY + merge) against PostgreSQL
+"""
+
+import argparse
+import gzip
+import hashlib
+import importlib.util
+import sys
+import tempfile
+import time
+import resource
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+_spec = importlib.util.spec_from_file_location(
+    "feed_importer", ROOT / "src/analyzers/hash-checker/src/feed_importer.py"
+)
+feed_importer = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(feed_importer)
+
+
+def write_feed(path: Path, rows: int):
+    algorithms = (hashlib.md5, hashlib.sha1, hashlib.sha256)
+    with gzip.open(path, "wt", compresslevel=1) as fh:
+        fh.write("hash,signature,family,severity\n")
+        for i in range(rows):
+            digest = algorithms[i % 3](i.to_bytes(8, "little")).hexdigest()
+            fh.write(f"{digest},Trojan.Gen.{i % 997},family-{i % 61},high\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dsn", default=None,
+                        help="run the full import against this database")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "feed.csv.gz"
+        write_feed(path, args.rows)
+        print(f"feed: {args.rows:,} rows, {path.stat().st_size / 1e6:.1f} MB gzipped")
+
+        stats = feed_importer.ImportStats()
+        rows = feed_importer.iter_feed_rows(path)
+        stream = feed_importer.CopyStream(rows, "bench", stats)
+        started = time.perf_counter()
+        copied = 0
+        while True:
+            chunk = stream.read(1 << 20)
+            if not chunk:
+                break
+            copied += len(chunk)
+        elapsed = time.perf_counter() - started
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"parse+validate+serialize: {stats.rows_read / elapsed:,.0f} rows/s, "
+              f"{copied / 1e6:.0f} MB COPY text, peak RSS {peak_rss / 1024:.0f} MB")
+
+        if args.dsn:
+            importer = feed_importer.FeedImporter(args.dsn, source="bench")
+            result = importer.run(path)
+            print(f"full import: {result.rows_per_second:,.0f} rows/s "
+                  f"(load {result.load_seconds:.1f}s, "
+                  f"merge {result.merge_seconds:.1f}s; "
+                  f"+{result.inserted} ~{result.updated} -{result.deleted})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+File hashing benchmark
+Builds a tree of mixed file sizes and compares three separate hashlib
+passes per file against FileHasher (single pass, thread pool), then
+re-hashes the tree with a partly modified file set to show cache hit rates
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.shared.utils.file_hasher import FileHasher  # noqa: E402
+
+# (count, size) buckets: many small scripts/configs, fewer libraries, a few big blobs
+SIZES = [(2000, 4 << 10), (400, 256 << 10), (40, 4 << 20), (4, 64 << 20)]
+
+
+def build_tree(root: Path, scale: float, seed: int):
+    rng = random.Random(seed)
+    paths = []
+    block = os.urandom(1 << 20)
+    for count, size in SIZES:
+        for i in range(max(1, int(count * scale))):
+            path = root / f"{size}" / f"f{i}.bin"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            actual = max(1, int(size * rng.uniform(0.5, 1.5)))
+            with open(path, "wb") as fh:
+                remaining = actual
+                while remaining:
+                    n = min(remaining, len(block))
+                    fh.write(block[:n])
+                    remaining -= n
+            paths.append(str(path))
+    return paths
+
+
+def three_pass(path: str):
+    digests = {}
+    for name in ("md5", "sha1", "sha256"):
+        h = hashlib.new(name)
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 16), b""):
+                h.update(chunk)
+        digests[name] = h.hexdigest()
+    return digests
+
+
+def timed(label, fn, paths, total_bytes):
+    started = time.perf_counter()
+    fn(paths)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {total_bytes / elapsed / 1e6:8.1f} MB/s  ({elapsed:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=min(8, os.cpu_count() or 1))
+    parser.add_argument("--modified", type=float, default=0.05,
+                        help="fraction of files rewritten before the second run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = build_tree(Path(tmp), args.scale, seed=1)
+        total = sum(os.path.getsize(p) for p in paths)
+        print(f"tree: {len(paths)} files, {total / 1e6:.0f} MB, {args.workers} workers")
+
+        timed("three passes, sequential",
+              lambda ps: [three_pass(p) for p in ps], paths, total)
+
+        hasher = FileHasher(max_workers=args.workers, cache_path="")
+        with ThreadPoolExecutor(args.workers) as pool:
+            timed("single pass, thread pool (cold)",
+                  lambda ps: list(pool.map(hasher.hash, ps)), paths, total)
+
+            rng = random.Random(2)
+            for path in rng.sample(paths, int(len(paths) * args.modified)):
+                with open(path, "ab") as fh:
+                    fh.write(b"update")
+            before = hasher.stats.cache_hits, hasher.stats.cache_misses
+            timed("single pass, thread pool (warm)",
+                  lambda ps: list(pool.map(hasher.hash, ps)), paths, total)
+            hits = hasher.stats.cache_hits - before[0]
+            misses = hasher.stats.cache_misses - before[1]
+            print(f"warm run cache hit rate: {hits / (hits + misses):.1%} "
+                  f"({hits} hits, {misses} re-hashed)")
+        hasher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Event-loop latency benchmark for service logging
+Runs a ticker coroutine that measures scheduling lag while another
+coroutine logs per-event DEBUG lines, once with the synchronous
+StreamHandler services used to attach and once with the queued handler
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.shared.utils import structured_logging  # noqa: E402
+
+
+class SlowStream:
+    """Stand-in for a stdout that is slow to drain (pipe, container log driver)"""
+
+    def __init__(self, delay_us: float):
+        self.delay = delay_us / 1e6
+
+    def write(self, data):
+        if self.delay:
+            time.sleep(self.delay)
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def sync_logger(stream) -> logging.Logger:
+    logger = logging.getLogger("bench.sync")
+    logger.handlers.clear()
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(structured_logging.TEXT_FORMAT))
+    logger.addHandler(handler)
+    return logger
+
+
+async def measure(logger: logging.Logger, events: int, batch: int, tick: float):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(tick)
+            lags.append(time.perf_counter() - start - tick)
+
+    async def producer():
+        for i in range(0, events, batch):
+            for j in range(i, i + batch):
+                logger.debug("processed event %s from %s", j, "host-a")
+            await asyncio.sleep(0)
+        done.set()
+
+    started = time.perf_counter()
+    await asyncio.gather(ticker(), producer())
+    elapsed = time.perf_counter() - started
+    lags.sort()
+    return {
+        "events/s": events / elapsed,
+        "lag p50 ms": statistics.median(lags) * 1e3,
+        "lag p99 ms": lags[int(len(lags) * 0.99) - 1] * 1e3,
+        "lag max ms": lags[-1] * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--tick-ms", type=float, default=1.0)
+    parser.add_argument("--write-delay-us", type=float, default=20.0)
+    parser.add_argument("--debug-sample-every", type=int, default=1)
+    args = parser.parse_args()
+
+    stream = SlowStream(args.write_delay_us)
+    real_stdout, sys.stdout = sys.stdout, stream
+    try:
+        results = {"StreamHandler": asyncio.run(measure(
+            sync_logger(stream), args.events, args.batch, args.tick_ms / 1e3))}
+        queued = structured_logging.setup_logging(
+            "bench.queued", level="DEBUG", rate=0,
+            debug_sample_every=args.debug_sample_every,
+        )
+        results["NonBlockingQueueHandler"] = asyncio.run(measure(
+            queued, args.events, args.batch, args.tick_ms / 1e3))
+        counters = structured_logging.get_logging_stats()
+        structured_logging.stop_logging()
+    finally:
+        sys.stdout = real_stdout
+
+    for name, result in results.items():
+        print(name)
+        for metric, value in result.items():
+            print(f"  {metric:<12} {value:,.2f}")
+    print("queued handler counters:", counters)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Command-line search benchmark
+Fills a scratch copy of the events table with synthetic process events via
+generate_series, builds the trigram indexes, and times substring, prefix
+and regex searches through the same query builder the API uses
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import psycopg2
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+from src.api.search import SearchField, SearchMode, build_search_query  # noqa: E402
+
+TABLE_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+DROP TABLE IF EXISTS bench_events;
+CREATE UNLOGGED TABLE bench_events (
+    id BIGINT,
+    event_type VARCHAR(100) NOT NULL,
+    timestamp TIMESTAMPTZ NOT NULL,
+    hostname VARCHAR(255) NOT NULL,
+    data JSONB NOT NULL,
+    command_line TEXT GENERATED ALWAYS AS
+        (regexp_replace(lower(data->>'command_line'), '\\s+', ' ', 'g')) STORED,
+    file_path TEXT GENERATED ALWAYS AS
+        (regexp_replace(lower(data->>'file_path'), '\\s+', ' ', 'g')) STORED
+);
+"""
+
+# Mostly benign command lines with a rare suspicious one every 100k rows.
+# mod() instead of the % operator, which psycopg2 reserves for parameters
+FILL_SQL = """
+INSERT INTO bench_events (id, event_type, timestamp, hostname, data)
+SELECT i, 'process.start',
+       %(end)s - mod(i, %(span)s) * interval '1 second',
+       'host-' || mod(i, 5000),
+       jsonb_build_object(
+           'command_line', CASE
+               WHEN mod(i, 100000) = 0 THEN
+                   'powershell.exe -NoP -Enc SQBFAFgA' || md5(i::text)
+               ELSE (ARRAY[
+                   'C:\\Windows\\System32\\svchost.exe -k netsvcs -p',
+                   'chrome.exe --type=renderer --field-trial-handle=',
+                   '/usr/bin/python3 /opt/app/worker.py --queue',
+                   'C:\\Program Files\\Git\\bin\\git.exe fetch origin'
+               ])[mod(i, 4) + 1] || ' ' || md5(i::text)
+           END,
+           'file_path',
+           'C:\\Users\\user' || mod(i, 5000) || '\\AppData\\' || md5(i::text))
+FROM generate_series(%(lo)s, %(hi)s) AS i
+"""
+
+INDEX_SQL = """
+CREATE INDEX ON bench_events USING GIN (command_line gin_trgm_ops);
+CREATE INDEX ON bench_events USING GIN (file_path gin_trgm_ops);
+CREATE INDEX ON bench_events (timestamp DESC);
+ANALYZE bench_events;
+"""
+
+QUERIES = [
+    ("substring", SearchField.COMMAND_LINE, SearchMode.SUBSTRING, "-enc sqbfafga"),
+    ("prefix", SearchField.COMMAND_LINE, SearchMode.PREFIX, "powershell.exe -nop"),
+    ("regex", SearchField.COMMAND_LINE, SearchMode.REGEX,
+     r"powershell.*-enc [a-z0-9]{8}"),
+    ("path", SearchField.FILE_PATH, SearchMode.SUBSTRING, r"\appdata\00000"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dsn", required=True)
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument("--batch", type=int, default=5_000_000)
+    parser.add_argument("--days", type=int, default=30, help="time span the rows cover")
+    parser.add_argument("--skip-load", action="store_true", help="reuse bench_events")
+    args = parser.parse_args()
+
+    end = datetime.now(timezone.utc)
+    conn = psycopg2.connect(args.dsn)
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        if not args.skip_load:
+            cur.execute(TABLE_SQL)
+            started = time.perf_counter()
+            for lo in range(1, args.rows + 1, args.batch):
+                hi = min(lo + args.batch - 1, args.rows)
+                cur.execute(FILL_SQL, {"lo": lo, "hi": hi, "end": end,
+                                       "span": args.days * 86400})
+                print(f"  loaded {hi:,} rows", flush=True)
+            loaded = time.perf_counter()
+            cur.execute(INDEX_SQL)
+            indexed = time.perf_counter()
+            print(f"load {loaded - started:.0f}s, index {indexed - loaded:.0f}s")
+
+        cur.execute("SELECT pg_size_pretty(pg_total_relation_size('bench_events'))")
+        print(f"table + indexes: {cur.fetchone()[0]}")
+
+        for label, field, mode, query in QUERIES:
+            for span in (timedelta(days=1), timedelta(days=args.days)):
+                sql, params = build_search_query(query, field, mode, end - span, end,
+                                                 limit=1000)
+                sql = sql.replace("FROM events", "FROM bench_events")
+                started = time.perf_counter()
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+                elapsed = time.perf_counter() - started
+                cur.execute("EXPLAIN " + sql, params)
+                plan = " / ".join(line for (line,) in cur.fetchall() if "Index" in line)
+                print(f"{label:>9} {span.days:>2}d: {len(rows):>5} rows in "
+                      f"{elapsed * 1000:8.1f} ms  [{plan.strip() or 'no index'}]")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()